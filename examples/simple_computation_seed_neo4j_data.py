@@ -66,10 +66,12 @@ async def main():
     )
     args = parser.parse_args()
 
-    manager = Neo4jGraphManager(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD)
+    labels = sorted({spec["label"] for spec in SEED_SPECS.values() if spec.get("label")})
+    manager = Neo4jGraphManager(NEO4J_URI, NEO4J_USER, NEO4J_PASSWORD, business_labels=labels)
     try:
         await manager.connect()
         logger.info("Connected to Neo4j")
+        await manager.ensure_schema()
 
         if args.clear:
             await clear_nodes_by_uuids(manager, list(SEED_SPECS.keys()))
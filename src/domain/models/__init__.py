@@ -4,7 +4,7 @@ from .computation_relation_type import ComputationRelationType
 from .io_spec import InputSpec, OutputSpec
 from .computation_node import ComputationNode
 from .computation_relationship import ComputationRelationship
-from .computation_graph import ComputationGraph
+from .computation_graph import ComputationGraph, derive_writer_reader_edges
 
 __all__ = [
     'ComputationLevel',
@@ -15,4 +15,5 @@ __all__ = [
     'ComputationNode',
     'ComputationRelationship',
     'ComputationGraph',
+    'derive_writer_reader_edges',
 ]
@@ -4,16 +4,42 @@
 - 数据节点（DataNode）由关系中的 source_id/target_id 引用，不在本结构中显式存储。
 - 通过 add_computation_node / add_computation_relationship 链式构建，每次返回新图实例。
 - get_data_node_ids / get_output_properties_by_data_node 供执行器与 Neo4j 同步使用。
+- derive_writer_reader_edges / get_implicit_dependencies：按 (数据节点, 属性) 哈希连接推导「先写后读」依赖边。
 """
 
 from dataclasses import dataclass, field
-from typing import Dict, List, Mapping, Set, Tuple
+from typing import Dict, Iterable, List, Mapping, Set, Tuple
 
 from .computation_node import ComputationNode
 from .computation_relationship import ComputationRelationship
 from .computation_relation_type import ComputationRelationType
 
 
+def derive_writer_reader_edges(
+    relationships: Iterable[ComputationRelationship],
+) -> List[Tuple[str, str]]:
+    """
+    推导计算节点间隐式的「写者 -> 读者」依赖边：计算节点 A 经 OUTPUT_TO 写 (data_node, prop)，
+    计算节点 B 经 DEPENDS_ON 读同一 (data_node, prop)，则 A 必须先于 B 执行。
+
+    以 (data_node_id, property_name) 为键建立写者索引后逐条匹配读关系，复杂度 O(关系数 + 边数)。
+    返回去重后的 (writer_id, reader_id) 列表，按首次出现顺序排列；不含自环。
+    """
+    rels = list(relationships)
+    writers: Dict[Tuple[str, str | None], List[str]] = {}
+    for rel in rels:
+        if rel.relation_type == ComputationRelationType.OUTPUT_TO and rel.data_output:
+            writers.setdefault((rel.target_id, rel.data_output.property_name), []).append(rel.source_id)
+    edges: Dict[Tuple[str, str], None] = {}
+    for rel in rels:
+        if rel.relation_type != ComputationRelationType.DEPENDS_ON or not rel.datasource:
+            continue
+        for writer in writers.get((rel.source_id, rel.datasource.property_name), ()):
+            if writer != rel.target_id:
+                edges[(writer, rel.target_id)] = None
+    return list(edges)
+
+
 @dataclass(frozen=True, slots=True)
 class ComputationGraph:
     """不可变计算图：计算节点 + 关系（DEPENDS_ON / OUTPUT_TO），outgoing/incoming 为关系索引。"""
@@ -80,6 +106,31 @@ class ComputationGraph:
             out[rel.target_id].append(rel.data_output.property_name)
         return out
 
+    def get_required_properties_by_data_node(self) -> Dict[str, List[str]]:
+        """
+        每个数据节点被图用到的属性名（DEPENDS_ON 读取的 datasource.property_name 与 OUTPUT_TO 写入的
+        data_output.property_name，按首次出现顺序去重），供加载时只拉取这些属性。没有任何属性名的数据节点不出现。
+        """
+        comp_ids = set(self.computation_nodes.keys())
+        out: Dict[str, List[str]] = {}
+        for rel in self.computation_relationships.values():
+            if rel.relation_type == ComputationRelationType.DEPENDS_ON:
+                node_id, spec = rel.source_id, rel.datasource
+            elif rel.relation_type == ComputationRelationType.OUTPUT_TO:
+                node_id, spec = rel.target_id, rel.data_output
+            else:
+                continue
+            if node_id in comp_ids or not spec or not spec.property_name:
+                continue
+            props = out.setdefault(node_id, [])
+            if spec.property_name not in props:
+                props.append(spec.property_name)
+        return out
+
+    def get_implicit_dependencies(self) -> List[Tuple[str, str]]:
+        """计算节点间经由数据节点属性形成的「先写后读」依赖边 (writer_id, reader_id)。"""
+        return derive_writer_reader_edges(self.computation_relationships.values())
+
     def add_computation_node(self, node: ComputationNode) -> 'ComputationGraph':
         """添加一个计算节点，返回新图（本图不可变）。"""
         new_nodes = {**self.computation_nodes, node.id: node}
@@ -1,22 +1,69 @@
 # Data provider for Neo4j (used by Neo4jGraphManager and demos)
-from .computation_executor import DataProvider, Neo4jDataProvider
+from .computation_executor import BulkWriteStats, DataProvider, Neo4jDataProvider
+
+# Compiled code cache for computation node expressions
+from .code_cache import clear_code_cache, compile_node_code
+
+# Compiled execution plan (cached by the executor)
+from .execution_plan import ExecutionPlan, NodeBindings, PlanStep
+
+# Optional cross-scenario memoization of node results
+from .result_memo import MemoStats, NodeResultMemo
+
+# Per-node timing / profiling hooks
+from .execution_profiler import ExecutionProfiler, NodeProfile, NodeTiming
+
+# Chrome trace-event export
+from .tracing import TraceRecorder
 
 # NetworkX-based graph executor
 from .computation_graph_executor import ComputationGraphExecutor
 
+# Column-wise (NumPy) batch executor for many entity rows; numpy is imported lazily
+from .vectorized_executor import VectorizedGraphExecutor
+
+# On-disk node_data_map cache validated by per-node version stamps
+from .node_data_cache import NodeDataCache
+
 # Neo4j graph manager for creating/persisting graphs
 from .neo4j_graph_manager import Neo4jGraphManager
 
+# Watermark-based incremental refresh of executor baseline data
+from .data_refresher import IncrementalDataRefresher, RefreshResult
+
 # What-If simulator for scenario testing
-from .what_if_simulator import NodeError, ScenarioRunResult, WhatIfSimulator, format_scenario_result
+from .what_if_simulator import (
+    NodeError,
+    ScenarioRunResult,
+    ScenarioState,
+    WhatIfSimulator,
+    format_scenario_result,
+)
 
 __all__ = [
+    'BulkWriteStats',
     'DataProvider',
     'Neo4jDataProvider',
+    'clear_code_cache',
+    'compile_node_code',
+    'ExecutionPlan',
+    'NodeBindings',
+    'PlanStep',
+    'MemoStats',
+    'NodeResultMemo',
+    'ExecutionProfiler',
+    'NodeProfile',
+    'NodeTiming',
+    'TraceRecorder',
     'ComputationGraphExecutor',
+    'VectorizedGraphExecutor',
+    'NodeDataCache',
     'Neo4jGraphManager',
+    'IncrementalDataRefresher',
+    'RefreshResult',
     'NodeError',
     'ScenarioRunResult',
+    'ScenarioState',
     'WhatIfSimulator',
     'format_scenario_result',
 ]
@@ -0,0 +1,57 @@
+"""
+计算节点代码编译缓存：将 ComputationNode.code 编译为代码对象，避免每次 eval 重新解析。
+
+- 缓存键为 (node_id, code_hash)：同一节点换了公式（热替换）时哈希不同，自动重新编译。
+- 语法错误在编译时（执行器加载计算图时）以 ValueError 抛出，而不是运行时静默返回 None。
+- 缓存有上限，按 LRU 淘汰，避免长时间运行中不断替换公式导致无限增长。
+"""
+
+import hashlib
+from collections import OrderedDict
+from types import CodeType
+from typing import Dict, Tuple
+
+from ..models import ComputationGraph
+
+# Upper bound on cached code objects (LRU eviction)
+CODE_CACHE_MAX_SIZE = 4096
+
+_code_cache: "OrderedDict[Tuple[str, str], CodeType]" = OrderedDict()
+
+
+def code_hash(code: str) -> str:
+    """计算代码文本的哈希（sha1 十六进制），用于缓存键与结果记忆化。"""
+    return hashlib.sha1(code.encode("utf-8")).hexdigest()
+
+
+def compile_node_code(node_id: str, code: str) -> CodeType:
+    """
+    返回节点代码的编译结果（eval 模式）；命中缓存时直接返回。
+    Raises ValueError if the code is not a valid Python expression.
+    """
+    key = (node_id, code_hash(code))
+    compiled = _code_cache.get(key)
+    if compiled is not None:
+        _code_cache.move_to_end(key)
+        return compiled
+    try:
+        compiled = compile(code, f"<computation:{node_id}>", "eval")
+    except SyntaxError as e:
+        raise ValueError(f"Invalid code for computation node {node_id!r}: {e.msg} ({code!r})") from e
+    _code_cache[key] = compiled
+    if len(_code_cache) > CODE_CACHE_MAX_SIZE:
+        _code_cache.popitem(last=False)
+    return compiled
+
+
+def compile_graph_code(graph: ComputationGraph) -> Dict[str, CodeType]:
+    """编译图中全部计算节点的代码，返回 node_id -> 代码对象；任一节点语法错误即抛 ValueError。"""
+    return {
+        node_id: compile_node_code(node_id, node.code)
+        for node_id, node in graph.computation_nodes.items()
+    }
+
+
+def clear_code_cache() -> None:
+    """清空编译缓存（测试或大规模替换公式后使用）。"""
+    _code_cache.clear()
@@ -5,9 +5,67 @@ Neo4j 数据访问层：抽象 DataProvider 与 Neo4jDataProvider 实现。
 图执行在 computation_graph_executor 中。
 """
 
+import asyncio
+import re
 from abc import ABC, abstractmethod
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from time import perf_counter
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
-from typing import Any, Dict, List, Mapping, Optional, Tuple
+# Default number of uuids per UNWIND query in bulk loads
+DEFAULT_LOAD_BATCH_SIZE = 1000
+
+# Default number of bulk-load chunks in flight at once (bounded by the driver's connection pool)
+DEFAULT_LOAD_CONCURRENCY = 4
+
+# Default number of rows per UNWIND transaction in bulk writes
+DEFAULT_WRITE_BATCH_SIZE = 500
+
+
+# Labels and relationship types cannot be query parameters; only plain identifiers are interpolated
+_CYPHER_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+
+def validate_cypher_identifier(name: str, kind: str = "label") -> str:
+    """
+    校验将要拼入 Cypher 的标签 / 关系类型名（只允许字母、数字、下划线，且不以数字开头）。
+    Raises ValueError otherwise.
+    """
+    if not isinstance(name, str) or not _CYPHER_IDENTIFIER.match(name):
+        raise ValueError(f"Invalid Neo4j {kind} {name!r}: must match {_CYPHER_IDENTIFIER.pattern}")
+    return name
+
+
+def _cypher_properties(properties: Optional[Mapping[str, Any]]) -> Dict[str, Any]:
+    """属性 dict -> $props 参数：str/int/float/bool 原样传递，其他类型转为字符串（与原内联写法一致）。"""
+    return {
+        key: val if isinstance(val, (str, int, float, bool)) else str(val)
+        for key, val in (properties or {}).items()
+    }
+
+
+def _projected_uuid_query(match: str, var: str, where: Optional[str] = None) -> str:
+    """
+    由 MATCH 子句（及可选 WHERE 条件）构造按 uuid 批量读取的查询：row.keys 为 NULL 时返回 properties(var)，
+    否则只返回请求的属性（[key, value] 对）。
+    """
+    where_clause = f"WHERE {where} " if where else ""
+    return (
+        f"UNWIND $rows AS row {match} {where_clause}"
+        f"RETURN row.uuid AS uuid, "
+        f"CASE WHEN row.keys IS NULL THEN properties({var}) END AS props, "
+        f"[k IN coalesce(row.keys, []) WHERE {var}[k] IS NOT NULL | [k, {var}[k]]] AS pairs"
+    )
+
+
+@dataclass(frozen=True, slots=True)
+class BulkWriteStats:
+    """批量写入的统计：请求行数、实际写入行数、事务（批）数与总耗时（秒）。"""
+    requested: int = 0
+    written: int = 0
+    batches: int = 0
+    seconds: float = 0.0
 
 
 class DataProvider(ABC):
@@ -200,6 +258,163 @@ class Neo4jDataProvider(DataProvider):
                 return None
             return dict(record["props"])
 
+    async def get_data_nodes_by_uuids(
+        self,
+        uuids: Iterable[str],
+        *,
+        properties: Optional[Mapping[str, Iterable[str]]] = None,
+        labels: Optional[Sequence[str]] = None,
+        relationship_types: Optional[Sequence[str]] = None,
+        batch_size: int = DEFAULT_LOAD_BATCH_SIZE,
+        concurrency: int = DEFAULT_LOAD_CONCURRENCY,
+        modified_since: Any = None,
+        stamp_property: str = "updated_at",
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        Bulk variant of get_data_node_by_uuid: read properties of many business nodes (excluding DataNode)
+        or relationships by uuid with chunked UNWIND queries (per chunk: node queries, then relationship
+        queries, each only for the uuids not found yet). Up to `concurrency` chunks are in flight at once
+        (asyncio.Semaphore + gather); each in-flight chunk borrows a session from a small pool that is
+        reused across chunks, so at most `concurrency` sessions are opened.
+
+        Args:
+            uuids: uuids to look up (duplicates are queried once).
+            properties: Optional projection uuid -> property names to fetch; only those keys are sent
+                over the wire (absent keys are omitted). uuids not in the mapping fetch all properties.
+            labels: Optional business node labels; when given, nodes are matched per label
+                (MATCH (n:Label {uuid: ...})) so the uuid index of each label is used, instead of a label-less scan.
+            relationship_types: Optional relationship types to match by uuid in the same way.
+            batch_size: Number of uuids per UNWIND query.
+            concurrency: Maximum number of chunks queried concurrently (1 = sequential, one session).
+            modified_since: Optional watermark; when given, only nodes / relationships whose stamp_property
+                is >= modified_since are returned (change polling). Nodes without the stamp are skipped.
+            stamp_property: Version stamp property compared with modified_since (e.g. updated_at).
+
+        Returns:
+            uuid -> properties for every uuid that was found; missing uuids are absent.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        if concurrency < 1:
+            raise ValueError(f"concurrency must be >= 1, got {concurrency}")
+        projection = {uuid: list(keys) for uuid, keys in (properties or {}).items()}
+        pending = list(dict.fromkeys(uuids))
+        found: Dict[str, Dict[str, Any]] = {}
+        if self._using_mock:
+            wanted = set(pending)
+            for data in self._mock_data.values():
+                if not isinstance(data, dict) or data.get("type") in ("relationship", "DataNode"):
+                    continue
+                if labels and data.get("type") not in labels:
+                    continue
+                if modified_since is not None and (
+                    data.get(stamp_property) is None or data[stamp_property] < modified_since
+                ):
+                    continue
+                uuid = data.get("uuid")
+                if uuid in wanted and uuid not in found:
+                    keys = projection.get(uuid)
+                    found[uuid] = {
+                        k: v for k, v in data.items()
+                        if k != "type" and (keys is None or k in keys)
+                    }
+            return found
+
+        driver = self._get_driver()
+        if driver is None:
+            return found
+
+        params: Dict[str, Any] = {}
+        stamp_filter: Dict[str, Optional[str]] = {"n": None, "r": None}
+        if modified_since is not None:
+            params = {"since": modified_since, "stamp": stamp_property}
+            stamp_filter = {"n": "n[$stamp] >= $since", "r": "r[$stamp] >= $since"}
+        node_queries = [
+            _projected_uuid_query(
+                f"MATCH (n:{validate_cypher_identifier(label)} {{uuid: row.uuid}})", "n", stamp_filter["n"]
+            )
+            for label in labels
+        ] if labels else [
+            _projected_uuid_query(
+                "MATCH (n)",
+                "n",
+                " AND ".join(filter(None, ["n.uuid = row.uuid AND NOT (n:DataNode)", stamp_filter["n"]])),
+            )
+        ]
+        rel_queries = [
+            _projected_uuid_query(
+                f"MATCH ()-[r:{validate_cypher_identifier(rel_type, 'relationship type')} {{uuid: row.uuid}}]->()",
+                "r",
+                stamp_filter["r"],
+            )
+            for rel_type in relationship_types
+        ] if relationship_types else [
+            _projected_uuid_query(
+                "MATCH ()-[r]->()",
+                "r",
+                " AND ".join(filter(None, ["r.uuid = row.uuid", stamp_filter["r"]])),
+            )
+        ]
+        queries = node_queries + rel_queries
+        chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+        semaphore = asyncio.Semaphore(concurrency)
+        idle_sessions: List[Any] = []
+
+        async def _load_chunk(chunk: List[str], stack: AsyncExitStack) -> Dict[str, Dict[str, Any]]:
+            chunk_found: Dict[str, Dict[str, Any]] = {}
+            async with semaphore:
+                if idle_sessions:
+                    session = idle_sessions.pop()
+                else:
+                    session = await stack.enter_async_context(driver.session())
+                try:
+                    rows = [{"uuid": uuid, "keys": projection.get(uuid)} for uuid in chunk]
+                    for query in queries:
+                        missing = [row for row in rows if row["uuid"] not in chunk_found]
+                        if not missing:
+                            break
+                        await self._collect_props(session, query, missing, chunk_found, params)
+                finally:
+                    idle_sessions.append(session)
+            return chunk_found
+
+        async with AsyncExitStack() as stack:
+            tasks = [asyncio.ensure_future(_load_chunk(chunk, stack)) for chunk in chunks]
+            try:
+                results = await asyncio.gather(*tasks)
+            except BaseException:
+                # Sessions close with the stack: stop and await every other chunk before leaving it
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+                raise
+        for chunk_found in results:
+            found.update(chunk_found)
+        return found
+
+    @staticmethod
+    async def _collect_props(
+        session,
+        query: str,
+        rows: List[Dict[str, Any]],
+        found: Dict[str, Dict[str, Any]],
+        params: Optional[Dict[str, Any]] = None,
+    ) -> None:
+        """
+        Run an UNWIND $rows query returning (uuid, props, pairs); keep the first match per uuid.
+        Full fetches (props) must be non-empty; projected fetches (pairs) count as found even if empty.
+        """
+        result = await session.run(query, rows=rows, **(params or {}))
+        async for record in result:
+            uuid = record["uuid"]
+            if uuid in found:
+                continue
+            if record["props"] is not None:
+                if record["props"]:
+                    found[uuid] = dict(record["props"])
+            else:
+                found[uuid] = {key: value for key, value in record["pairs"]}
+
     async def set_node_properties(
         self,
         node_id: str,
@@ -257,39 +472,21 @@ class Neo4jDataProvider(DataProvider):
 
         Returns:
             The ID of the created node, or None if creation failed
+            Raises ValueError if node_type is not a plain identifier.
         """
+        label = validate_cypher_identifier(node_type, "label")
         if self._using_mock:
-            return self.create_mock_node(node_type, properties)
+            return self.create_mock_node(label, properties)
 
         driver = self._get_driver()
         if driver is None:
             return None
 
-        # Build property string with proper Cypher value formatting
-        prop_parts = []
-
-        for key, val in properties.items():
-            if isinstance(val, str):
-                # String values: escape single quotes for Cypher (double the quote)
-                escaped = val.replace("\\", "\\\\").replace("'", "\\'")
-                prop_parts.append(f"`{key}`: '{escaped}'")
-            elif isinstance(val, (int, float)):
-                # Numbers don't need quotes
-                prop_parts.append(f"`{key}`: {val}")
-            elif isinstance(val, bool):
-                # Booleans use true/false
-                prop_parts.append(f"`{key}`: {str(val).lower()}")
-            else:
-                # Other types convert to string with quotes
-                prop_parts.append(f"`{key}`: '{str(val)}'")
-
-        props_str = ", ".join(prop_parts)
-
-        # Build query
-        cypher_query = f"CREATE (n:{node_type} {{{props_str}}}) RETURN elementId(n) AS node_id"
+        # Properties are sent as a $props map so the server can reuse the query plan
+        cypher_query = f"CREATE (n:{label} $props) RETURN elementId(n) AS node_id"
 
         async with driver.session() as session:
-            result = await session.run(cypher_query)
+            result = await session.run(cypher_query, props=_cypher_properties(properties))
             record = await result.single()
 
             if record is None:
@@ -297,6 +494,108 @@ class Neo4jDataProvider(DataProvider):
 
             return str(record["node_id"])
 
+    async def set_data_node_properties_bulk(
+        self,
+        updates: Mapping[str, Mapping[str, Any]],
+        *,
+        batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+    ) -> BulkWriteStats:
+        """
+        Bulk variant of set_node_properties(match_by_uuid=True): update properties of many DataNodes
+        (SET n += props) with UNWIND $rows, one row per DataNode uuid, in chunks of batch_size
+        inside a single write transaction.
+
+        Args:
+            updates: DataNode uuid -> properties to set (only these keys are written).
+            batch_size: Number of DataNodes per UNWIND query.
+
+        Returns:
+            BulkWriteStats; written counts DataNodes that were found and updated.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        start = perf_counter()
+        rows = [
+            {"uuid": uuid, "props": dict(props)}
+            for uuid, props in updates.items()
+            if props
+        ]
+        batches = (len(rows) + batch_size - 1) // batch_size
+        if self._using_mock:
+            written = 0
+            for row in rows:
+                mock_id = f"datanode_{row['uuid']}"
+                if mock_id in self._mock_data:
+                    self._mock_data[mock_id].update(row["props"])
+                    written += 1
+            return BulkWriteStats(len(rows), written, batches, perf_counter() - start)
+
+        driver = self._get_driver()
+        if driver is None or not rows:
+            return BulkWriteStats(requested=len(rows))
+
+        query = (
+            "UNWIND $rows AS row "
+            "MATCH (n:DataNode {uuid: row.uuid}) SET n += row.props "
+            "RETURN count(n) AS written"
+        )
+
+        async def _update_all(tx):
+            total = 0
+            for i in range(0, len(rows), batch_size):
+                result = await tx.run(query, rows=rows[i:i + batch_size])
+                record = await result.single()
+                total += record["written"] if record is not None else 0
+            return total
+
+        async with driver.session() as session:
+            written = await session.execute_write(_update_all)
+        return BulkWriteStats(len(rows), written, batches, perf_counter() - start)
+
+    async def create_nodes(
+        self,
+        node_type: str,
+        properties_list: Sequence[Mapping[str, Any]],
+        *,
+        batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+    ) -> List[Optional[str]]:
+        """
+        Bulk variant of create_node: CREATE many nodes with the same label using parameterized
+        UNWIND $rows, one write transaction per chunk of batch_size, in a single session.
+
+        Returns:
+            The IDs of the created nodes, in input order.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        label = validate_cypher_identifier(node_type, "label")
+        if self._using_mock:
+            return [self.create_mock_node(label, props) for props in properties_list]
+
+        driver = self._get_driver()
+        if driver is None:
+            return [None] * len(properties_list)
+
+        rows = [_cypher_properties(props) for props in properties_list]
+        query = (
+            "UNWIND range(0, size($rows) - 1) AS i "
+            f"CREATE (n:{label}) SET n = $rows[i] "
+            "RETURN i, elementId(n) AS node_id"
+        )
+
+        async def _create_chunk(tx, chunk):
+            result = await tx.run(query, rows=chunk)
+            ids: List[Optional[str]] = [None] * len(chunk)
+            async for record in result:
+                ids[record["i"]] = str(record["node_id"])
+            return ids
+
+        node_ids: List[Optional[str]] = []
+        async with driver.session() as session:
+            for i in range(0, len(rows), batch_size):
+                node_ids.extend(await session.execute_write(_create_chunk, rows[i:i + batch_size]))
+        return node_ids
+
     async def merge_data_node(
         self, uuid: str, properties: Mapping[str, Any]
     ) -> Optional[str]:
@@ -334,6 +633,62 @@ class Neo4jDataProvider(DataProvider):
                 return None
             return str(record["u"])
 
+    async def merge_data_nodes(
+        self,
+        nodes: Mapping[str, Mapping[str, Any]],
+        *,
+        batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+        replace: bool = True,
+    ) -> BulkWriteStats:
+        """
+        Bulk variant of merge_data_node: MERGE many DataNodes by uuid and set their properties with
+        UNWIND $rows, one explicit (managed, retried) write transaction per chunk, in a single session.
+
+        Args:
+            nodes: uuid -> properties (uuid is added to the properties when absent).
+            batch_size: Number of DataNodes per transaction.
+            replace: True replaces each DataNode's properties (SET n = ...); False only adds / updates the
+                given ones (SET n += ...), e.g. when nodes holds a property projection.
+
+        Returns:
+            BulkWriteStats with requested / written counts, number of transactions and elapsed seconds.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        start = perf_counter()
+        rows = [
+            {"uuid": uuid, "props": {**dict(props), "uuid": props.get("uuid", uuid)}}
+            for uuid, props in nodes.items()
+        ]
+        if self._using_mock:
+            for row in rows:
+                await self.merge_data_node(row["uuid"], row["props"])
+            batches = (len(rows) + batch_size - 1) // batch_size
+            return BulkWriteStats(len(rows), len(rows), batches, perf_counter() - start)
+
+        driver = self._get_driver()
+        if driver is None:
+            return BulkWriteStats(requested=len(rows))
+
+        query = (
+            "UNWIND $rows AS row "
+            f"MERGE (n:DataNode {{uuid: row.uuid}}) SET n {'=' if replace else '+='} row.props "
+            "RETURN count(n) AS written"
+        )
+
+        async def _merge_chunk(tx, chunk):
+            result = await tx.run(query, rows=chunk)
+            record = await result.single()
+            return record["written"] if record is not None else 0
+
+        written = 0
+        batches = 0
+        async with driver.session() as session:
+            for i in range(0, len(rows), batch_size):
+                written += await session.execute_write(_merge_chunk, rows[i:i + batch_size])
+                batches += 1
+        return BulkWriteStats(len(rows), written, batches, perf_counter() - start)
+
     def get_mock_node_data(self, node_id: str) -> Optional[Dict[str, Any]]:
         """Get node data from mock storage"""
         return self._mock_data.get(node_id)
@@ -390,7 +745,9 @@ class Neo4jDataProvider(DataProvider):
 
         Returns:
             The ID of the created relationship, or None if creation failed.
+            Raises ValueError if rel_type is not a plain identifier.
         """
+        rel_type = validate_cypher_identifier(rel_type, "relationship type")
         if self._using_mock:
             import uuid as _uuid
             rel_id = str(_uuid.uuid4())
@@ -407,21 +764,6 @@ class Neo4jDataProvider(DataProvider):
         if driver is None:
             return None
 
-        if properties:
-            prop_parts = []
-            for key, val in properties.items():
-                if isinstance(val, str):
-                    prop_parts.append(f"`{key}`: '{val}'")
-                elif isinstance(val, (int, float)):
-                    prop_parts.append(f"`{key}`: {val}")
-                elif isinstance(val, bool):
-                    prop_parts.append(f"`{key}`: {str(val).lower()}")
-                else:
-                    prop_parts.append(f"`{key}`: '{str(val)}'")
-            props_str = " {" + ", ".join(prop_parts) + "}"
-        else:
-            props_str = ""
-
         if source_match_by_uuid:
             source_match = "MATCH (source:DataNode {uuid: $source_id})"
         else:
@@ -434,7 +776,7 @@ class Neo4jDataProvider(DataProvider):
         cypher_query = f"""
             {source_match}
             {target_match}
-            CREATE (source)-[r:{rel_type}{props_str}]->(target)
+            CREATE (source)-[r:{rel_type} $props]->(target)
             RETURN elementId(r) AS rel_id
         """
 
@@ -443,6 +785,7 @@ class Neo4jDataProvider(DataProvider):
                 cypher_query,
                 source_id=source_node_id,
                 target_id=target_node_id,
+                props=_cypher_properties(properties),
             )
             record = await result.single()
 
@@ -451,6 +794,73 @@ class Neo4jDataProvider(DataProvider):
 
             return str(record["rel_id"])
 
+    async def create_relationships(
+        self,
+        rel_type: str,
+        rows: Sequence[Tuple[str, str, Mapping[str, Any]]],
+        *,
+        source_match_by_uuid: bool = False,
+        target_match_by_uuid: bool = False,
+        batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+    ) -> int:
+        """
+        Bulk variant of create_relationship: create many relationships of one type with parameterized
+        UNWIND $rows, one write transaction per chunk of batch_size, in a single session.
+
+        Args:
+            rel_type: The type of all relationships.
+            rows: (source_id, target_id, properties) per relationship; ids are matched as in create_relationship.
+            source_match_by_uuid / target_match_by_uuid: Match endpoints as DataNode by uuid instead of elementId.
+            batch_size: Number of relationships per transaction.
+
+        Returns:
+            Number of relationships created (rows whose endpoints are not found are skipped).
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        validate_cypher_identifier(rel_type, "relationship type")
+        if self._using_mock:
+            created = 0
+            for source_id, target_id, props in rows:
+                rel_id = await self.create_relationship(source_id, target_id, rel_type, props)
+                created += rel_id is not None
+            return created
+
+        driver = self._get_driver()
+        if driver is None:
+            return 0
+
+        if source_match_by_uuid:
+            source_match = "MATCH (source:DataNode {uuid: row.source_id})"
+        else:
+            source_match = "MATCH (source) WHERE elementId(source) = row.source_id"
+        if target_match_by_uuid:
+            target_match = "MATCH (target:DataNode {uuid: row.target_id})"
+        else:
+            target_match = "MATCH (target) WHERE elementId(target) = row.target_id"
+        query = (
+            "UNWIND $rows AS row "
+            f"{source_match} "
+            f"{target_match} "
+            f"CREATE (source)-[r:{rel_type}]->(target) SET r = row.props "
+            "RETURN count(r) AS created"
+        )
+        params = [
+            {"source_id": source_id, "target_id": target_id, "props": _cypher_properties(props)}
+            for source_id, target_id, props in rows
+        ]
+
+        async def _create_chunk(tx, chunk):
+            result = await tx.run(query, rows=chunk)
+            record = await result.single()
+            return record["created"] if record is not None else 0
+
+        created = 0
+        async with driver.session() as session:
+            for i in range(0, len(params), batch_size):
+                created += await session.execute_write(_create_chunk, params[i:i + batch_size])
+        return created
+
     async def close(self) -> None:
         """Close the Neo4j driver"""
         if self._driver is not None:
@@ -2,14 +2,27 @@
 计算图执行器：基于 NetworkX 的拓扑执行与单节点求值。
 
 流程：将 ComputationGraph + node_data_map 转为有向图 -> 依赖图拓扑排序 -> 按序执行每个计算节点。
-单节点执行：从 DEPENDS_ON 来源收集变量 -> eval(code) -> 按 OUTPUT_TO 写回后继节点。
-支持 snapshot/restore 与 update_node_property，供 What-If 场景在内存中改值后重跑并恢复。
+拓扑序与输入/输出绑定编译为 ExecutionPlan 并缓存，计算图不变时每次 execute() 直接复用。
+节点代码在加载计算图时编译（语法错误即抛 ValueError），执行时 eval 预编译的代码对象。
+单节点执行：按绑定索引（计算节点 -> 读/写绑定）从 DEPENDS_ON 来源收集变量 -> eval(code) -> 按 OUTPUT_TO 写回后继节点。
+支持 snapshot/restore 与 update_node_property，供 What-If 场景在内存中改值后重跑并恢复；
+execute_incremental 仅重算被修改属性下游影响锥中的计算节点，结果未变时截断传播（可设数值容差）。
+可选 ExecutionProfiler：记录每个节点的收集输入 / eval / 写回耗时、调用与异常次数，并可回调。
+可选 NodeResultMemo：按 (代码哈希, 输入值) 记忆化节点结果，跨场景命中时跳过 eval。
+evaluate(targets) 按需求值：只执行目标属性的祖先计算节点。
+execute_parallel 按拓扑层级把互不依赖的计算节点分发到线程/进程池，按计划顺序写回，结果确定。
+scenario_overlay 提供 copy-on-write 覆盖层：场景写入稀疏 delta，基线只读，丢弃场景为 O(1)。
 """
 
 import copy
 import logging
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime, timedelta
-from typing import Optional, Dict, List
+from time import perf_counter
+from types import CodeType
+from typing import Optional, Dict, Iterable, Iterator, List, Set, Tuple
 import networkx as nx
 
 logger = logging.getLogger(__name__)
@@ -18,15 +31,79 @@ from ..models import (
     ComputationRelationType,
     ComputationGraph,
 )
+from .code_cache import compile_graph_code, compile_node_code
+from .execution_plan import (
+    ExecutionPlan,
+    NodeBindings,
+    PlanStep,
+    build_binding_index,
+    build_execution_plan,
+    build_plan_step,
+)
+from .execution_profiler import ExecutionProfiler, NodeTiming
+from .result_memo import NodeResultMemo
 
 
-class ComputationGraphExecutor:
-    """基于 NetworkX 的计算图执行器：建图、拓扑序执行、单节点 eval、快照/恢复。"""
+def _eval_code(compiled: CodeType, variables: Dict[str, object]) -> Tuple[bool, object]:
+    """eval 预编译代码（注入 datetime/timedelta 供日期表达式使用）；返回 (是否成功, 结果或异常)。"""
+    try:
+        return True, eval(compiled, {"datetime": datetime, "timedelta": timedelta}, variables)
+    except Exception as e:
+        return False, e
+
+
+def _eval_node_code(node_id: str, code: str, variables: Dict[str, object]) -> Tuple[bool, object]:
+    """进程池 worker 中求值：代码对象不可 pickle，按 (node_id, code) 在 worker 内编译并缓存。"""
+    return _eval_code(compile_node_code(node_id, code), variables)
+
 
-    def __init__(self, graph: ComputationGraph, node_data_map: Dict[str, Dict]):
+def _timed_eval(fn, *args) -> Tuple[bool, object, float, float, int]:
+    """在池 worker 中调用 fn(*args) 并计时；返回 (是否成功, 结果或异常, 开始, 结束, 线程 ID)（perf_counter 读数）。"""
+    t0 = perf_counter()
+    ok, value = fn(*args)
+    return ok, value, t0, perf_counter(), threading.get_ident()
+
+
+class ComputationGraphExecutor:
+    """基于 NetworkX 的计算图执行器：建图、拓扑序执行、单节点 eval、快照/恢复与场景覆盖层。"""
+
+    def __init__(
+        self,
+        graph: ComputationGraph,
+        node_data_map: Dict[str, Dict],
+        *,
+        memo: Optional[NodeResultMemo] = None,
+        change_tolerance: float = 0.0,
+        profiler: Optional[ExecutionProfiler] = None,
+    ):
+        """
+        Args:
+            graph: The computation graph to execute.
+            node_data_map: Initial data node properties keyed by data node id.
+            memo: Optional NodeResultMemo; when given, node results are memoized by (code hash, input values)
+                and reused across executions/scenarios (nodes with properties["memoize"] = False opt out).
+            change_tolerance: Absolute tolerance for the equality cutoff in execute_incremental(); numeric
+                results that differ from the previous value by at most this much count as unchanged.
+            profiler: Optional ExecutionProfiler; when set, every node execution records a NodeTiming
+                (gather / eval / write-back time, errors, memo hits). Can also be assigned later.
+        """
+        # Compile every node's code up front so syntax errors surface at graph load
+        compile_graph_code(graph)
         self.graph = graph
         self.node_data_map = node_data_map
+        self.memo = memo
+        self.change_tolerance = change_tolerance
+        self.profiler = profiler
+        self.last_executed_node_ids: List[str] = []
         self.G = self._build_networkx_graph()
+        self._bindings: Dict[str, NodeBindings] = {}
+        self._bindings_graph: Optional[ComputationGraph] = None
+        self._plan: Optional[ExecutionPlan] = None
+        self._plan_graph: Optional[ComputationGraph] = None
+        self._dirty: Set[Tuple[str, str]] = set()
+        self._baseline_dirty: Set[Tuple[str, str]] = set()  # baseline dirty set parked while an overlay is active
+        self._baseline_snapshot: Optional[Dict[str, Dict]] = None  # cached baseline data nodes; reset on baseline writes
+        self._overlay: Optional[Dict[str, Dict]] = None
 
     def _build_networkx_graph(self) -> nx.DiGraph:
         """将计算图与数据节点转为 NetworkX 有向图：数据节点带 is_computation=False，计算节点带 code/engine/priority。"""
@@ -76,18 +153,8 @@ class ComputationGraphExecutor:
             (source, target) for source, target, data in self.G.edges(data=True)
             if data.get("relation_type") == "DEPENDS_ON"
         ])
-        # Writer -> reader from relationship list (preserves multiple props per data_node->comp)
-        outputs = []  # (writer_comp, data_node, property_name)
-        reads = []    # (data_node, reader_comp, property_name)
-        for rel in self.graph.computation_relationships.values():
-            if rel.relation_type == ComputationRelationType.OUTPUT_TO and getattr(rel, "data_output", None):
-                outputs.append((rel.source_id, rel.target_id, rel.data_output.property_name))
-            elif rel.relation_type == ComputationRelationType.DEPENDS_ON and getattr(rel, "datasource", None):
-                reads.append((rel.source_id, rel.target_id, rel.datasource.property_name))
-        for (writer, data_node, prop) in outputs:
-            for (dn, reader, read_prop) in reads:
-                if data_node == dn and prop == read_prop and writer != reader:
-                    dep_graph.add_edge(writer, reader)
+        # Writer -> reader via (data_node, prop) index (preserves multiple props per data_node->comp)
+        dep_graph.add_edges_from(self.graph.get_implicit_dependencies())
         return dep_graph
 
     def _get_execution_order(self) -> Optional[List[str]]:
@@ -100,74 +167,372 @@ class ComputationGraphExecutor:
             logger.error("Graph contains a cycle: %s", e)
             return None
 
-    def _execute_node(self, node_id: str, verbose: bool = True) -> Optional[float]:
-        """执行单个计算节点：从 DEPENDS_ON 来源收集变量 -> eval(code) -> 按 OUTPUT_TO 写回后继。"""
-        node_data = self.G.nodes[node_id]
-
-        if not node_data.get("is_computation"):
-            return None
-
-        if verbose:
-            logger.info("Executing: %s (%s)", node_id, node_data.get('name'))
-            logger.info("  Code: %s", node_data.get('code'))
+    def get_binding_index(self) -> Dict[str, NodeBindings]:
+        """返回计算节点 ID -> NodeBindings（读/写绑定）索引；每个图只构建一次。"""
+        if self._bindings_graph is not self.graph:
+            self._bindings = build_binding_index(self.graph)
+            self._bindings_graph = self.graph
+        return self._bindings
+
+    def get_execution_plan(self) -> Optional[ExecutionPlan]:
+        """返回缓存的执行计划；首次调用（或 self.graph 被替换后）编译一次。存在环时返回 None。"""
+        if self._plan_graph is not self.graph:
+            order = self._get_execution_order()
+            self._plan = (
+                build_execution_plan(self.graph, order, self.get_binding_index())
+                if order is not None else None
+            )
+            self._plan_graph = self.graph
+        return self._plan
 
-        # Gather input variables from incoming DEPENDS_ON edges only (by source + property_name).
+    def _gather_inputs(self, step: PlanStep) -> Dict[str, object]:
+        """按输入绑定收集变量（经覆盖层读取）。"""
         # If the source node does not have the property, pass None so the computation can define
         # behavior for missing data (e.g. default to False/0) without mutating raw data.
-        variables = {}
-        for rel in self.graph.computation_relationships.values():
-            if rel.relation_type != ComputationRelationType.DEPENDS_ON or rel.target_id != node_id:
-                continue
-            if not getattr(rel, "datasource", None) or not rel.datasource.property_name:
-                continue
-            src_id = rel.source_id
-            prop = rel.datasource.property_name
-            if src_id in self.G.nodes:
-                variables[prop] = self.G.nodes[src_id].get(prop, None)
-
-        # Execute computation (inject datetime/timedelta for date expressions)
-        code = node_data.get("code", "")
-        safe_globals = {"datetime": datetime, "timedelta": timedelta}
-        try:
-            result = eval(code, safe_globals, variables)
+        nodes = self.G.nodes
+        if self._overlay is None:
+            return {prop: nodes[src_id].get(prop, None) for src_id, prop in step.inputs}
+        return {prop: self._overlay_get(src_id, prop) for src_id, prop in step.inputs}
+
+    def _write_outputs(self, step: PlanStep, result, verbose: bool) -> None:
+        """按输出目标写回结果（覆盖层开启时写入 delta）。"""
+        nodes = self.G.nodes
+        overlay = self._overlay
+        for target_id, property_name in step.outputs:
+            if overlay is None:
+                nodes[target_id][property_name] = result
+                self._baseline_snapshot = None
+            else:
+                overlay.setdefault(target_id, {})[property_name] = result
             if verbose:
-                logger.info("  Result: %s", result)
-
-            # Update successors via OUTPUT_TO edges
-            for successor in self.G.successors(node_id):
-                edge_data = self.G.edges[node_id, successor]
-                if edge_data.get("relation_type") == "OUTPUT_TO":
-                    property_name = edge_data.get("property_name")
-                    if property_name:
-                        self.G.nodes[successor][property_name] = result
-                        if verbose:
-                            logger.info("  -> Updated %s.%s = %s", successor, property_name, result)
-            return result
-        except Exception as e:
+                logger.info("  -> Updated %s.%s = %s", target_id, property_name, result)
+
+    def _apply_result(self, step: PlanStep, ok: bool, value, verbose: bool) -> Optional[float]:
+        """处理一次求值的结果：成功则写回并返回结果，失败则记录错误并返回 None。"""
+        if not ok:
+            if verbose:
+                logger.error("  Error: %s", value)
+            return None
+        if verbose:
+            logger.info("  Result: %s", value)
+        self._write_outputs(step, value, verbose)
+        return value
+
+    def _execute_step(self, step: PlanStep, verbose: bool = True) -> Optional[float]:
+        """执行一个计划步骤：按输入绑定收集变量 -> eval(code) -> 按输出目标写回。"""
+        if self.profiler is not None:
+            return self._execute_step_profiled(step, verbose)
+        if verbose:
+            logger.info("Executing: %s (%s)", step.node_id, step.name)
+            logger.info("  Code: %s", step.code)
+        variables = self._gather_inputs(step)
+        key, hit, value = self._memo_lookup(step, variables)
+        if hit:
             if verbose:
-                logger.error("  Error: %s", e)
+                logger.info("  (memo hit)")
+            return self._apply_result(step, True, value, verbose)
+        ok, value = _eval_code(step.compiled, variables)
+        self._memo_store(step, key, ok, value)
+        return self._apply_result(step, ok, value, verbose)
+
+    def _execute_step_profiled(self, step: PlanStep, verbose: bool) -> Optional[float]:
+        """与 _execute_step 相同，但分阶段计时并把 NodeTiming 交给 self.profiler。"""
+        if verbose:
+            logger.info("Executing: %s (%s)", step.node_id, step.name)
+            logger.info("  Code: %s", step.code)
+        start = perf_counter()
+        variables = self._gather_inputs(step)
+        gathered = perf_counter()
+        key, hit, value = self._memo_lookup(step, variables)
+        ok = True
+        if not hit:
+            ok, value = _eval_code(step.compiled, variables)
+            self._memo_store(step, key, ok, value)
+        evaluated = perf_counter()
+        result = self._apply_result(step, ok, value, verbose)
+        self.profiler.record(NodeTiming(
+            node_id=step.node_id,
+            start=start,
+            gather_seconds=gathered - start,
+            eval_seconds=evaluated - gathered,
+            write_seconds=perf_counter() - evaluated,
+            ok=ok,
+            memo_hit=hit,
+        ))
+        return result
+
+    def _memo_lookup(self, step: PlanStep, variables: Dict[str, object]) -> Tuple[object, bool, object]:
+        """查记忆化缓存：返回 (key, 是否命中, 缓存值)；未启用记忆化或节点退出时 key 为 None、不命中。"""
+        memo = self.memo
+        if memo is None or not step.memoize:
+            return None, False, None
+        key = memo.make_key(step.code_hash, variables)
+        cached = memo.lookup(step.node_id, key)
+        if memo.is_miss(cached):
+            return key, False, None
+        return key, True, cached
+
+    def _memo_store(self, step: PlanStep, key, ok: bool, value) -> None:
+        """成功求值后写入记忆化缓存（失败结果不缓存）。"""
+        if ok and key is not None:
+            self.memo.store(step.node_id, key, value)
+
+    def _execute_node(self, node_id: str, verbose: bool = True) -> Optional[float]:
+        """执行单个计算节点：通过绑定索引取得 DEPENDS_ON 来源与 OUTPUT_TO 目标（O(度数)，不扫描关系表）。"""
+        node = self.graph.get_computation_node(node_id)
+        if node is None:
             return None
+        step = build_plan_step(node, self.get_binding_index().get(node_id, NodeBindings()))
+        return self._execute_step(step, verbose)
 
     def execute(self, verbose: bool = True) -> bool:
         """按拓扑序执行全部计算节点；返回是否成功（有环时 False）。"""
-        order = self._get_execution_order()
-        if order is None:
+        plan = self.get_execution_plan()
+        if plan is None:
             return False
 
         if verbose:
-            logger.info("Execution order: %s", " -> ".join(order))
+            logger.info("Execution order: %s", " -> ".join(plan.order))
 
-        for node_id in order:
-            self._execute_node(node_id, verbose)
-            if verbose and self.G.nodes[node_id].get("is_computation"):
+        for step in plan.steps:
+            self._execute_step(step, verbose)
+            if verbose:
                 logger.info("")
 
+        self._dirty.clear()
+        return True
+
+    def execute_incremental(
+        self,
+        dirty: Optional[Iterable[Tuple[str, str]]] = None,
+        verbose: bool = True,
+    ) -> bool:
+        """
+        增量执行：仅重算脏属性下游影响锥中的计算节点（按拓扑序）；返回是否成功（有环时 False）。
+
+        dirty 为被修改的 (node_id, property_name)；另外会合并 update_node_property 自上次执行以来记录的脏属性。
+        前提是当前状态已是一次完整 execute() 后的一致状态。注意：被覆盖的若是某计算节点的输出属性，
+        该计算节点本身不会重算（不会覆盖掉此值），只重算读取它的下游节点。
+
+        等值截断：节点重算后若输出与原值相等（数值差不超过 change_tolerance），该输出不再视为脏；
+        影响锥中输入全部未变的节点被跳过。实际执行的节点记录在 last_executed_node_ids。
+        """
+        plan = self.get_execution_plan()
+        if plan is None:
+            return False
+        if dirty is not None:
+            self._dirty.update(dirty)
+        changed = set(self._dirty)
+        steps = plan.downstream_steps(changed)
+        self._dirty.clear()
+
+        if verbose:
+            logger.info("Incremental execution order: %s", " -> ".join(step.node_id for step in steps))
+
+        executed: List[str] = []
+        for step in steps:
+            if not any(binding in changed for binding in step.inputs):
+                if verbose:
+                    logger.info("Skipping: %s (inputs unchanged)", step.node_id)
+                continue
+            previous = [self.get_property_value(*binding) for binding in step.outputs]
+            self._execute_step(step, verbose)
+            executed.append(step.node_id)
+            for binding, old_value in zip(step.outputs, previous):
+                if not self._values_equal(old_value, self.get_property_value(*binding)):
+                    changed.add(binding)
+            if verbose:
+                logger.info("")
+
+        self.last_executed_node_ids = executed
+        return True
+
+    def _values_equal(self, old_value, new_value) -> bool:
+        """等值截断的比较：== 相等即视为未变；数值（非 bool）差的绝对值不超过 change_tolerance 也视为未变。"""
+        try:
+            if old_value == new_value:
+                return True
+        except Exception:
+            return False
+        if (
+            self.change_tolerance > 0
+            and isinstance(old_value, (int, float)) and not isinstance(old_value, bool)
+            and isinstance(new_value, (int, float)) and not isinstance(new_value, bool)
+        ):
+            return abs(new_value - old_value) <= self.change_tolerance
+        return False
+
+    def evaluate(
+        self,
+        targets: Iterable[Tuple[str, str]],
+        verbose: bool = False,
+    ) -> Dict[Tuple[str, str], object]:
+        """
+        按需求值（拉取式）：只执行计算 targets 所需的祖先计算节点（按拓扑序），返回 {(node_id, prop): value}。
+        结果同样写入当前状态（或覆盖层）。Raises ValueError if the graph contains a cycle.
+        """
+        targets = list(targets)
+        plan = self.get_execution_plan()
+        if plan is None:
+            raise ValueError(f"Computation graph {self.graph.id!r} contains a cycle.")
+        steps = plan.upstream_steps(targets)
+
+        if verbose:
+            logger.info("Demand-driven execution order: %s", " -> ".join(step.node_id for step in steps))
+
+        for step in steps:
+            self._execute_step(step, verbose)
+            if verbose:
+                logger.info("")
+
+        return {(node_id, prop): self.get_property_value(node_id, prop) for node_id, prop in targets}
+
+    def execute_parallel(
+        self,
+        verbose: bool = False,
+        *,
+        pool: Optional[Executor] = None,
+        max_workers: Optional[int] = None,
+        use_processes: bool = False,
+    ) -> bool:
+        """
+        按拓扑层级并行执行：同一层级（plan.levels）内的计算节点互不依赖，先按当前状态收集输入，
+        再把各节点的求值分发到线程池（或 use_processes=True 时的进程池），最后按计划顺序（priority、id）
+        依次写回，因此结果与 execute() 一致且确定。返回是否成功（有环时 False）。
+
+        pool 可传入复用的 concurrent.futures.Executor；未传入时按 max_workers 临时创建。
+        设置 profiler 时，并发求值的节点同样记录 NodeTiming：eval 在 worker 内计时，收集输入与写回在本线程计时；
+        线程池时 start 为 worker 内求值开始时刻、thread_id 为 worker 线程，进程池时 start 为提交时刻
+        （perf_counter 读数不跨进程可比）。
+        适合节点求值开销较大的图；对廉价表达式，线程调度开销可能高于收益。
+        """
+        plan = self.get_execution_plan()
+        if plan is None:
+            return False
+        if pool is None:
+            pool_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+            with pool_cls(max_workers=max_workers) as own_pool:
+                return self.execute_parallel(verbose, pool=own_pool, use_processes=use_processes)
+
+        for level in plan.levels:
+            steps = [plan.steps[i] for i in level]
+            if len(steps) == 1:
+                self._execute_step(steps[0], verbose)
+                continue
+            profiler = self.profiler
+            inputs = []
+            gather_seconds = []
+            for step in steps:
+                t0 = perf_counter()
+                inputs.append(self._gather_inputs(step))
+                gather_seconds.append(perf_counter() - t0)
+            lookups = [self._memo_lookup(step, variables) for step, variables in zip(steps, inputs)]
+            futures = {}
+            submitted = {}
+            for step, variables, (_, hit, _) in zip(steps, inputs, lookups):
+                if hit:
+                    continue
+                submitted[step.node_id] = perf_counter()
+                if use_processes:
+                    futures[step.node_id] = pool.submit(
+                        _timed_eval, _eval_node_code, step.node_id, step.code, variables
+                    )
+                else:
+                    futures[step.node_id] = pool.submit(_timed_eval, _eval_code, step.compiled, variables)
+            for step, gathered, (key, hit, value) in zip(steps, gather_seconds, lookups):
+                if verbose:
+                    logger.info("Executing: %s (%s)", step.node_id, step.name)
+                    logger.info("  Code: %s", step.code)
+                thread_id = None
+                if hit:
+                    ok = True
+                    start = perf_counter()
+                    eval_seconds = 0.0
+                else:
+                    ok, value, t0, t1, worker_thread = futures[step.node_id].result()
+                    self._memo_store(step, key, ok, value)
+                    start = submitted[step.node_id] if use_processes else t0
+                    eval_seconds = t1 - t0
+                    if not use_processes:
+                        thread_id = worker_thread
+                written = perf_counter()
+                self._apply_result(step, ok, value, verbose)
+                if profiler is not None:
+                    profiler.record(NodeTiming(
+                        node_id=step.node_id,
+                        start=start,
+                        gather_seconds=gathered,
+                        eval_seconds=eval_seconds,
+                        write_seconds=perf_counter() - written,
+                        ok=ok,
+                        memo_hit=hit,
+                        thread_id=thread_id,
+                    ))
+
+        self._dirty.clear()
         return True
 
     def update_node_property(self, node_id: str, property_name: str, value):
-        """Update a property value on a data node"""
+        """Update a property value on a data node (recorded as dirty for execute_incremental).
+        While a scenario overlay is active the value goes into the overlay, not the baseline."""
         if node_id in self.G.nodes:
-            self.G.nodes[node_id][property_name] = value
+            if self._overlay is None:
+                self.G.nodes[node_id][property_name] = value
+                self._baseline_snapshot = None
+            else:
+                self._overlay.setdefault(node_id, {})[property_name] = value
+            self._dirty.add((node_id, property_name))
+
+    def get_property_value(self, node_id: str, property_name: str):
+        """Current value of one property (through the active overlay); None if the node or property is missing."""
+        if node_id not in self.G.nodes:
+            return None
+        if self._overlay is None:
+            return self.G.nodes[node_id].get(property_name, None)
+        return self._overlay_get(node_id, property_name)
+
+    def _overlay_get(self, node_id: str, property_name: str):
+        """Read a property through the active overlay, falling back to the baseline value."""
+        delta = self._overlay.get(node_id)
+        if delta is not None and property_name in delta:
+            return delta[property_name]
+        return self.G.nodes[node_id].get(property_name, None)
+
+    @property
+    def overlay_active(self) -> bool:
+        """是否有场景覆盖层处于激活状态。"""
+        return self._overlay is not None
+
+    def begin_overlay(self) -> Dict[str, Dict]:
+        """
+        开启场景覆盖层（copy-on-write）：此后的属性写入与计算结果写入稀疏的 delta，基线只读不变。
+        返回 delta（node_id -> {prop -> value}）。不支持嵌套覆盖层。
+        基线上尚未执行的脏属性被暂存，覆盖层从空的脏集合开始，discard_overlay() 时恢复。
+        """
+        if self._overlay is not None:
+            raise RuntimeError("A scenario overlay is already active on this executor.")
+        self._baseline_dirty = self._dirty
+        self._dirty = set()
+        self._overlay = {}
+        return self._overlay
+
+    def discard_overlay(self) -> Dict[str, Dict]:
+        """丢弃当前覆盖层（O(1)，基线无需恢复），恢复基线的脏属性集合，返回被丢弃的 delta。"""
+        delta = self._overlay or {}
+        if self._overlay is not None:
+            self._dirty = self._baseline_dirty
+            self._baseline_dirty = set()
+        self._overlay = None
+        return delta
+
+    @contextmanager
+    def scenario_overlay(self) -> Iterator[Dict[str, Dict]]:
+        """上下文管理器：进入时 begin_overlay()，退出（含异常）时 discard_overlay()。"""
+        delta = self.begin_overlay()
+        try:
+            yield delta
+        finally:
+            self.discard_overlay()
 
     def snapshot_data_nodes(self) -> Dict[str, Dict]:
         """深拷贝当前所有数据节点状态，供 What-If 结束后 restore_data_nodes(snapshot) 恢复。"""
@@ -183,19 +548,52 @@ class ComputationGraphExecutor:
             if node_id in self.G.nodes:
                 self.G.nodes[node_id].clear()
                 self.G.nodes[node_id].update(data)
+        self._dirty.clear()
+        self._baseline_snapshot = None
 
     def get_node_data(self, node_id: str) -> Optional[Dict]:
-        """Get current data for a node"""
+        """Get current data for a node (including active overlay values)"""
         if node_id in self.G.nodes:
-            return dict(self.G.nodes[node_id])
+            data = dict(self.G.nodes[node_id])
+            if self._overlay is not None and node_id in self._overlay:
+                data.update(self._overlay[node_id])
+            return data
         return None
 
     def get_all_data_nodes(self) -> Dict[str, Dict]:
-        """Get all data nodes"""
+        """Get all data nodes (including active overlay values)"""
+        return self._collect_data_nodes(self._overlay)
+
+    def get_baseline_snapshot(self) -> Dict[str, Dict]:
+        """
+        基线数据节点状态（忽略覆盖层），与覆盖层外 get_all_data_nodes() 的结果相同，但只在基线变化后重建：
+        覆盖层外的 update_node_property、execute 等写回与 restore_data_nodes 会使缓存失效。
+        返回的 dict 在调用之间共享，调用方不得修改；失效后旧快照保持不变，可以继续持有。
+        """
+        if self._baseline_snapshot is None:
+            self._baseline_snapshot = self._collect_data_nodes(None)
+        return self._baseline_snapshot
+
+    def _collect_data_nodes(self, overlay: Optional[Dict[str, Dict]]) -> Dict[str, Dict]:
+        """复制全部数据节点属性（去掉 is_computation），overlay 不为空时叠加其值。"""
+        all_data: Dict[str, Dict] = {}
+        for node_id, data in self.G.nodes(data=True):
+            if data.get("is_computation"):
+                continue
+            props = {k: v for k, v in data.items() if k != "is_computation"}
+            if overlay and node_id in overlay:
+                props.update(overlay[node_id])
+            all_data[node_id] = props
+        return all_data
+
+    def export_node_data_map(self) -> Dict[str, Dict]:
+        """
+        Current data node state as a node_data_map (executor bookkeeping attributes removed), suitable for
+        building another ComputationGraphExecutor with the same state, e.g. in a worker process.
+        """
         return {
-            node_id: {k: v for k, v in data.items() if k != "is_computation"}
-            for node_id, data in self.G.nodes(data=True)
-            if not data.get("is_computation")
+            node_id: {k: v for k, v in data.items() if k != "priority"}
+            for node_id, data in self.get_all_data_nodes().items()
         }
 
     def print_node_data(self, title: str = "Current Node Data"):
@@ -203,9 +601,7 @@ class ComputationGraphExecutor:
         logger.info("%s", title)
         logger.info("=" * 50)
 
-        for node_id, data in self.G.nodes(data=True):
-            if not data.get("is_computation"):
-                logger.info("[%s]", node_id)
-                for key, value in data.items():
-                    if key != "is_computation":
-                        logger.info("  %s: %s", key, value)
+        for node_id, data in self.get_all_data_nodes().items():
+            logger.info("[%s]", node_id)
+            for key, value in data.items():
+                logger.info("  %s: %s", key, value)
@@ -0,0 +1,136 @@
+"""
+增量数据刷新（CDC 风格）：轮询 Neo4j 中自水位线以来被修改的数据节点，只修补运行中执行器的基线并增量重算。
+
+- 以业务节点 / 关系上的版本戳属性（默认 updated_at）作为变更日志的替代：每次 refresh() 只拉取
+  stamp >= 水位线 的数据节点，且只拉取计算节点读取的属性（DEPENDS_ON）与版本戳。
+- 与执行器当前值不同的属性经 update_node_property 写入基线并标记为脏，随后 execute_incremental
+  只重算其下游影响锥；水位线推进到本次见到的最大版本戳。
+- 使用 >= 比较：与水位线同一时刻的变更不会漏掉；重复返回的节点值未变，不会触发重算。
+- 计算输出属性（OUTPUT_TO）不从 Neo4j 拉取或修补，即使它同时被下游节点读取（如 subtotal），由重算得到。
+- 前提：执行器已完成一次完整 execute()；场景覆盖层激活期间不能刷新（会抛 RuntimeError）。
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+from .computation_graph_executor import ComputationGraphExecutor
+from .neo4j_graph_manager import Neo4jGraphManager
+
+
+@dataclass(frozen=True, slots=True)
+class RefreshResult:
+    """一次刷新的结果：变化的数据节点、被修补的 (node_id, property_name)、实际重算的计算节点与新水位线。"""
+    changed_node_ids: Tuple[str, ...] = ()
+    patched_properties: Tuple[Tuple[str, str], ...] = ()
+    recomputed_node_ids: Tuple[str, ...] = ()
+    watermark: Any = None
+
+
+class IncrementalDataRefresher:
+    """按版本戳水位线轮询变更，修补执行器基线并增量重算下游影响锥。"""
+
+    def __init__(
+        self,
+        executor: ComputationGraphExecutor,
+        neo4j_manager: Neo4jGraphManager,
+        *,
+        data_node_id_to_neo4j_uuid: Optional[Dict[str, str]] = None,
+        stamp_property: str = "updated_at",
+        watermark: Any = None,
+    ):
+        """
+        Args:
+            executor: Running executor whose baseline is kept fresh (fully executed once).
+            neo4j_manager: Connected manager (its data_provider, labels and concurrency are used).
+            data_node_id_to_neo4j_uuid: Optional mapping from graph data node id to Neo4j uuid
+                (default: data node ids are the uuids).
+            stamp_property: Version stamp property on business nodes / relationships.
+            watermark: Initial watermark (e.g. the max stamp seen when node_data_map was loaded).
+                None: the first refresh() considers every data node.
+        """
+        self.executor = executor
+        self.neo4j_manager = neo4j_manager
+        self.stamp_property = stamp_property
+        self.watermark = watermark
+        self._reads_by_node: Dict[str, List[str]] = {}
+        computation_ids = executor.graph.computation_nodes
+        bindings = executor.get_binding_index()
+        # Computed outputs (OUTPUT_TO) may also be read downstream; they come from recomputation, never Neo4j
+        written = {binding for node_bindings in bindings.values() for binding in node_bindings.writes}
+        for node_bindings in bindings.values():
+            for node_id, prop in node_bindings.reads:
+                if node_id in computation_ids or (node_id, prop) in written:
+                    continue
+                props = self._reads_by_node.setdefault(node_id, [])
+                if prop not in props:
+                    props.append(prop)
+        mapping = data_node_id_to_neo4j_uuid or {}
+        self._uuid_by_node = {node_id: mapping.get(node_id, node_id) for node_id in self._reads_by_node}
+        # 多个数据节点映射到同一 uuid 时取属性并集（与 load_data_nodes_from_neo4j_by_mapping 相同）
+        self._projection: Dict[str, List[str]] = {}
+        for node_id, uuid in self._uuid_by_node.items():
+            keys = self._projection.setdefault(uuid, [])
+            keys.extend(k for k in self._reads_by_node[node_id] if k not in keys)
+        for keys in self._projection.values():
+            if stamp_property not in keys:
+                keys.append(stamp_property)
+
+    async def refresh(self, verbose: bool = False) -> RefreshResult:
+        """
+        轮询自水位线以来修改的数据节点，修补变化的输入属性并增量重算。
+        Raises RuntimeError if a scenario overlay is active on the executor.
+        """
+        if self.executor.overlay_active:
+            raise RuntimeError("Cannot refresh baseline data while a scenario overlay is active.")
+        if not self._uuid_by_node:
+            return RefreshResult(watermark=self.watermark)
+        manager = self.neo4j_manager
+        rows = await manager.data_provider.get_data_nodes_by_uuids(
+            self._projection.keys(),
+            properties=self._projection,
+            labels=manager.business_labels,
+            relationship_types=manager.relationship_types,
+            concurrency=manager.load_concurrency,
+            modified_since=self.watermark,
+            stamp_property=self.stamp_property,
+        )
+
+        changed_node_ids: List[str] = []
+        patched: List[Tuple[str, str]] = []
+        watermark = self.watermark
+        for node_id, uuid in self._uuid_by_node.items():
+            props = rows.get(uuid)
+            if props is None:
+                continue
+            stamp = props.get(self.stamp_property)
+            if stamp is not None and (watermark is None or stamp > watermark):
+                watermark = stamp
+            node_patched = False
+            for prop in self._reads_by_node[node_id]:
+                if prop not in props:
+                    continue
+                if props[prop] != self.executor.get_property_value(node_id, prop):
+                    self.executor.update_node_property(node_id, prop, props[prop])
+                    patched.append((node_id, prop))
+                    node_patched = True
+            if node_patched:
+                changed_node_ids.append(node_id)
+
+        recomputed: Tuple[str, ...] = ()
+        if patched:
+            self.executor.execute_incremental(verbose=verbose)
+            recomputed = tuple(self.executor.last_executed_node_ids)
+        self.watermark = watermark
+        logger.info(
+            "Refresh: %d data nodes changed, %d properties patched, %d computation nodes recomputed",
+            len(changed_node_ids), len(patched), len(recomputed),
+        )
+        return RefreshResult(
+            changed_node_ids=tuple(changed_node_ids),
+            patched_properties=tuple(patched),
+            recomputed_node_ids=recomputed,
+            watermark=watermark,
+        )
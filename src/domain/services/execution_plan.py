@@ -0,0 +1,201 @@
+"""
+执行计划：将不可变的 ComputationGraph 编译为可复用的执行计划。
+
+- NodeBindings：每个计算节点读取的 (source_id, property_name) 与写入的 (target_id, property_name)，
+  由 build_binding_index 一次遍历关系表得到，执行单个节点时无需再扫描全部关系。
+- ExecutionPlan：按拓扑序排列的计算节点步骤（PlanStep），每一步带预解析的输入绑定与输出目标。
+- 每步的代码经 code_cache 编译为代码对象，执行时直接 eval，不再重复解析。
+- 计划附带 (node_id, property_name) -> 读取它的计算节点 的反向索引，供增量执行求下游影响锥；
+  以及 (node_id, property_name) -> 写入它的计算节点 的索引，供按需求值时反向求所需祖先。
+- levels 将步骤分组为拓扑层级（反链）：同层节点互不依赖，可并行求值；层内按计划顺序（priority、id）排列。
+- 计算图不可变，计划只需编译一次；ComputationGraphExecutor 缓存计划，供每次 execute() 与 What-If 场景复用。
+"""
+
+from dataclasses import dataclass, field
+from types import CodeType
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+
+from ..models import ComputationGraph, ComputationNode, ComputationRelationType
+from .code_cache import code_hash, compile_node_code
+
+
+@dataclass(frozen=True, slots=True)
+class NodeBindings:
+    """计算节点的读写绑定：reads 为 DEPENDS_ON 的 (source_id, property_name)，writes 为 OUTPUT_TO 的 (target_id, property_name)。"""
+    reads: Tuple[Tuple[str, str], ...] = ()
+    writes: Tuple[Tuple[str, str], ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class PlanStep:
+    """计划中的一步：计算节点 ID、代码（文本、编译结果与哈希）、优先级，以及输入绑定 (source_id, property_name) 与输出目标 (target_id, property_name)。"""
+    node_id: str
+    name: str
+    code: str
+    compiled: CodeType
+    code_hash: str
+    priority: int
+    inputs: Tuple[Tuple[str, str], ...]
+    outputs: Tuple[Tuple[str, str], ...]
+    memoize: bool = True  # False when ComputationNode.properties["memoize"] is False (impure code)
+
+
+@dataclass(frozen=True, slots=True)
+class ExecutionPlan:
+    """编译后的执行计划：graph_id、按执行顺序排列的步骤（仅计算节点），以及读者反向索引与步骤位置。"""
+    graph_id: str
+    steps: Tuple[PlanStep, ...]
+    readers: Mapping[Tuple[str, str], Tuple[str, ...]] = field(default_factory=dict)
+    writers: Mapping[Tuple[str, str], Tuple[str, ...]] = field(default_factory=dict)
+    positions: Mapping[str, int] = field(default_factory=dict)
+    levels: Tuple[Tuple[int, ...], ...] = ()  # step indices per topological level
+
+    @property
+    def order(self) -> Tuple[str, ...]:
+        """计算节点执行顺序。"""
+        return tuple(step.node_id for step in self.steps)
+
+    def downstream_steps(self, dirty: Iterable[Tuple[str, str]]) -> Tuple[PlanStep, ...]:
+        """
+        给定被修改的 (node_id, property_name)，返回其下游影响锥中的计算步骤（按计划顺序）。
+        读取脏属性的计算节点进入影响锥，其输出再作为新的脏属性继续传播。
+        """
+        pending = list(dirty)
+        seen = set(pending)
+        cone = set()
+        while pending:
+            binding = pending.pop()
+            for node_id in self.readers.get(binding, ()):
+                if node_id in cone:
+                    continue
+                cone.add(node_id)
+                for output in self.steps[self.positions[node_id]].outputs:
+                    if output not in seen:
+                        seen.add(output)
+                        pending.append(output)
+        return tuple(self.steps[i] for i in sorted(self.positions[n] for n in cone))
+
+    def upstream_steps(self, targets: Iterable[Tuple[str, str]]) -> Tuple[PlanStep, ...]:
+        """
+        给定需要的 (node_id, property_name)，返回计算它们所需的全部祖先计算步骤（按计划顺序）。
+        写入目标属性的计算节点进入集合，其输入再作为新的目标继续向上回溯。
+        """
+        pending = list(targets)
+        seen = set(pending)
+        needed = set()
+        while pending:
+            binding = pending.pop()
+            for node_id in self.writers.get(binding, ()):
+                if node_id in needed:
+                    continue
+                needed.add(node_id)
+                for source in self.steps[self.positions[node_id]].inputs:
+                    if source not in seen:
+                        seen.add(source)
+                        pending.append(source)
+        return tuple(self.steps[i] for i in sorted(self.positions[n] for n in needed))
+
+
+def build_binding_index(graph: ComputationGraph) -> Dict[str, NodeBindings]:
+    """
+    一次遍历关系表，构建计算节点 ID -> NodeBindings 的索引（O(关系数)）。
+    保持关系插入顺序；同一 (target_id, property_name) 只写一次；无 property_name 的关系忽略。
+    """
+    reads: Dict[str, List[Tuple[str, str]]] = {}
+    writes: Dict[str, List[Tuple[str, str]]] = {}
+    for rel in graph.computation_relationships.values():
+        if rel.relation_type == ComputationRelationType.DEPENDS_ON:
+            if rel.datasource and rel.datasource.property_name:
+                reads.setdefault(rel.target_id, []).append((rel.source_id, rel.datasource.property_name))
+        elif rel.relation_type == ComputationRelationType.OUTPUT_TO:
+            if rel.data_output and rel.data_output.property_name:
+                binding = (rel.target_id, rel.data_output.property_name)
+                targets = writes.setdefault(rel.source_id, [])
+                if binding not in targets:
+                    targets.append(binding)
+    return {
+        node_id: NodeBindings(
+            reads=tuple(reads.get(node_id, ())),
+            writes=tuple(writes.get(node_id, ())),
+        )
+        for node_id in graph.computation_nodes
+    }
+
+
+def build_plan_step(node: ComputationNode, bindings: NodeBindings) -> PlanStep:
+    """由计算节点与其读写绑定构建一个计划步骤（代码经编译缓存编译）。"""
+    return PlanStep(
+        node_id=node.id,
+        name=node.name,
+        code=node.code,
+        compiled=compile_node_code(node.id, node.code),
+        code_hash=code_hash(node.code),
+        priority=node.priority,
+        inputs=bindings.reads,
+        outputs=bindings.writes,
+        memoize=node.get_property("memoize", True) is not False,
+    )
+
+
+def build_execution_plan(
+    graph: ComputationGraph,
+    order: Iterable[str],
+    bindings: Optional[Mapping[str, NodeBindings]] = None,
+) -> ExecutionPlan:
+    """
+    按给定拓扑序（可含数据节点，会被忽略）构建执行计划。
+    bindings 为 build_binding_index 的结果；未提供时现场构建。
+    Raises ValueError if any computation node's code fails to compile.
+    """
+    if bindings is None:
+        bindings = build_binding_index(graph)
+    steps = []
+    for node_id in order:
+        node = graph.computation_nodes.get(node_id)
+        if node is None:
+            continue
+        steps.append(build_plan_step(node, bindings.get(node_id, NodeBindings())))
+    readers: Dict[Tuple[str, str], List[str]] = {}
+    writers: Dict[Tuple[str, str], List[str]] = {}
+    for step in steps:
+        for binding in step.inputs:
+            step_readers = readers.setdefault(binding, [])
+            if step.node_id not in step_readers:
+                step_readers.append(step.node_id)
+        for binding in step.outputs:
+            writers.setdefault(binding, []).append(step.node_id)
+    return ExecutionPlan(
+        graph_id=graph.id,
+        steps=tuple(steps),
+        readers={binding: tuple(ids) for binding, ids in readers.items()},
+        writers={binding: tuple(ids) for binding, ids in writers.items()},
+        positions={step.node_id: i for i, step in enumerate(steps)},
+        levels=_build_levels(steps),
+    )
+
+
+def _build_levels(steps: List[PlanStep]) -> Tuple[Tuple[int, ...], ...]:
+    """
+    将按拓扑序排列的步骤分层：一个步骤的层级大于其所有输入的写者（及作为来源的计算节点）的层级；
+    写同一 (target_id, property_name) 的步骤也按计划顺序分在不同层级，保证写回结果与顺序执行一致。
+    """
+    step_level: Dict[str, int] = {}
+    writer_level: Dict[Tuple[str, str], int] = {}
+    levels: List[List[int]] = []
+    for i, step in enumerate(steps):
+        level = 0
+        for binding in step.inputs:
+            if binding in writer_level:
+                level = max(level, writer_level[binding] + 1)
+            if binding[0] in step_level:
+                level = max(level, step_level[binding[0]] + 1)
+        for binding in step.outputs:
+            if binding in writer_level:
+                level = max(level, writer_level[binding] + 1)
+        step_level[step.node_id] = level
+        for binding in step.outputs:
+            writer_level[binding] = level
+        if level == len(levels):
+            levels.append([])
+        levels[level].append(i)
+    return tuple(tuple(level) for level in levels)
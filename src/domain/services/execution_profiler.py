@@ -0,0 +1,85 @@
+"""
+执行剖析：记录每个计算节点的耗时、调用次数与异常次数，定位慢公式。
+
+- NodeTiming：单次节点执行的事件（开始时间、收集输入 / eval / 写回 各阶段耗时、是否成功、是否命中记忆化、求值线程）。
+- NodeProfile：按节点聚合的统计；ExecutionProfiler.report() 返回 node_id -> NodeProfile。
+- on_node 回调在每次节点执行后收到 NodeTiming，可接入监控或 trace 导出。
+- 执行器未设置 profiler 时只多一次 None 判断，开销可忽略。
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+
+@dataclass(frozen=True, slots=True)
+class NodeTiming:
+    """一次计算节点执行的计时事件（秒；start 为 time.perf_counter() 读数）。"""
+    node_id: str
+    start: float
+    gather_seconds: float
+    eval_seconds: float
+    write_seconds: float
+    ok: bool = True
+    memo_hit: bool = False
+    thread_id: Optional[int] = None  # eval 所在线程（execute_parallel 线程池 worker）；None 表示调用线程
+
+    @property
+    def total_seconds(self) -> float:
+        """三个阶段耗时之和。"""
+        return self.gather_seconds + self.eval_seconds + self.write_seconds
+
+
+@dataclass
+class NodeProfile:
+    """单个计算节点的聚合统计。"""
+    node_id: str
+    calls: int = 0
+    errors: int = 0
+    memo_hits: int = 0
+    total_seconds: float = 0.0
+    gather_seconds: float = 0.0
+    eval_seconds: float = 0.0
+    write_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+    @property
+    def mean_seconds(self) -> float:
+        """平均每次调用耗时。"""
+        return self.total_seconds / self.calls if self.calls else 0.0
+
+
+class ExecutionProfiler:
+    """聚合 NodeTiming 为按节点的统计，并可把每个事件转发给 on_node 回调。"""
+
+    def __init__(self, on_node: Optional[Callable[[NodeTiming], None]] = None):
+        self.on_node = on_node
+        self._profiles: Dict[str, NodeProfile] = {}
+
+    def record(self, timing: NodeTiming) -> None:
+        """记录一次节点执行（由执行器调用）。"""
+        profile = self._profiles.get(timing.node_id)
+        if profile is None:
+            profile = self._profiles[timing.node_id] = NodeProfile(timing.node_id)
+        total = timing.total_seconds
+        profile.calls += 1
+        profile.errors += 0 if timing.ok else 1
+        profile.memo_hits += 1 if timing.memo_hit else 0
+        profile.total_seconds += total
+        profile.gather_seconds += timing.gather_seconds
+        profile.eval_seconds += timing.eval_seconds
+        profile.write_seconds += timing.write_seconds
+        profile.max_seconds = max(profile.max_seconds, total)
+        if self.on_node is not None:
+            self.on_node(timing)
+
+    def report(self) -> Dict[str, NodeProfile]:
+        """按节点 ID 返回聚合统计。"""
+        return dict(self._profiles)
+
+    def slowest(self, n: int = 10) -> List[NodeProfile]:
+        """按总耗时降序返回前 n 个节点的统计。"""
+        return sorted(self._profiles.values(), key=lambda p: p.total_seconds, reverse=True)[:n]
+
+    def reset(self) -> None:
+        """清空已聚合的统计。"""
+        self._profiles.clear()
@@ -2,12 +2,20 @@
 Neo4j 图管理：业务节点创建、按 uuid/映射加载数据、计算图同步与可视化 Cypher。
 
 - create_business_nodes：按规格创建业务节点（Order、Shipment 等），供 seed 脚本使用。
-- load_graph_data_from_neo4j：按计算图所需数据节点 ID（或 data_node_id_to_neo4j_uuid 映射）从 Neo4j 拉取属性，得到 node_data_map。
+- load_graph_data_from_neo4j：按计算图所需数据节点 ID（或 data_node_id_to_neo4j_uuid 映射）从 Neo4j 拉取属性，得到 node_data_map；
+  以分块 UNWIND 查询批量读取（最多 load_concurrency 个分块并发，复用 session）；
+  默认只拉取图实际读写的属性（all_properties=True 拉取全部）。
+- load_graph_data_cached：以 NodeDataCache 本地磁盘缓存 node_data_map，按版本戳（updated_at）只重新拉取变化的节点。
+- ensure_schema：幂等创建 uuid / graph_id 索引与 DataNode.uuid 唯一约束；配置 business_labels / relationship_types 后
+  加载查询按标签 / 关系类型限定，命中这些索引。
+- 可选 tracer（TraceRecorder）：每次 load_graph_data_from_neo4j 记录一个 "neo4j.load" span。
+- write_back_diff / write_back_state：只把变化的 (节点, 属性) 按 DataNode 分组、以 UNWIND 批量在一个事务内写回。
 - sync_graph_to_neo4j：将数据节点 + 计算节点 + 关系写入 Neo4j，便于 Browser 可视化；clear_graph_from_neo4j 用于清理。
 """
 
 import logging
-from typing import Dict, Iterable, List, Optional, Tuple
+from contextlib import nullcontext
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -15,20 +23,55 @@ from ..models import (
     ComputationRelationType,
     ComputationGraph,
 )
-from .computation_executor import Neo4jDataProvider
+from .computation_executor import (
+    DEFAULT_LOAD_BATCH_SIZE,
+    DEFAULT_LOAD_CONCURRENCY,
+    DEFAULT_WRITE_BATCH_SIZE,
+    BulkWriteStats,
+    Neo4jDataProvider,
+    validate_cypher_identifier,
+)
+from .node_data_cache import NodeDataCache
+from .tracing import TraceRecorder
 
 
 # Default output properties for writing back to Neo4j
 OUTPUT_PROPERTIES = ["subtotal", "tax"]
+# Node attributes the executor adds to its NetworkX data nodes; never written back to Neo4j
+_EXECUTOR_INTERNAL_KEYS = frozenset({"is_computation", "priority"})
 
 
 class Neo4jGraphManager:
     """Manages Neo4j graph operations for computation graphs"""
 
-    def __init__(self, uri: str, user: str, password: str):
+    def __init__(
+        self,
+        uri: str,
+        user: str,
+        password: str,
+        *,
+        tracer: Optional[TraceRecorder] = None,
+        business_labels: Sequence[str] = (),
+        relationship_types: Sequence[str] = (),
+        load_concurrency: int = DEFAULT_LOAD_CONCURRENCY,
+    ):
+        """
+        business_labels / relationship_types: labels of business nodes (Order, Shipment, ...) and types of
+        relationships that carry data node uuids. When set, loaders match uuids per label / type so the
+        indexes created by ensure_schema() are used; when empty, loaders fall back to label-less scans.
+        load_concurrency: maximum number of bulk-load chunks queried concurrently.
+        """
+        if load_concurrency < 1:
+            raise ValueError(f"load_concurrency must be >= 1, got {load_concurrency}")
         self.uri = uri
         self.user = user
         self.password = password
+        self.tracer = tracer  # optional TraceRecorder: one span per load_graph_data_from_neo4j
+        self.load_concurrency = load_concurrency
+        self.business_labels = tuple(validate_cypher_identifier(label) for label in business_labels)
+        self.relationship_types = tuple(
+            validate_cypher_identifier(rel_type, "relationship type") for rel_type in relationship_types
+        )
         self.data_provider: Optional[Neo4jDataProvider] = None
         self.comp_node_id_map: Dict[str, str] = {}
 
@@ -45,6 +88,53 @@ class Neo4jGraphManager:
         if self.data_provider:
             await self.data_provider.close()
 
+    def get_schema_statements(self) -> List[str]:
+        """
+        返回 ensure_schema 执行的 Cypher 语句（均为 IF NOT EXISTS，可重复执行）：
+        DataNode.uuid 唯一约束、ComputationNode.graph_id / ComputationNode.id 索引、各业务标签 uuid 索引、
+        各关系类型（含 DEPENDS_ON / OUTPUT_TO）的 uuid 与 graph_id 关系属性索引。
+        """
+        statements = [
+            "CREATE CONSTRAINT datanode_uuid_unique IF NOT EXISTS "
+            "FOR (n:DataNode) REQUIRE n.uuid IS UNIQUE",
+            "CREATE INDEX computationnode_graph_id IF NOT EXISTS "
+            "FOR (n:ComputationNode) ON (n.graph_id)",
+            "CREATE INDEX computationnode_id IF NOT EXISTS "
+            "FOR (n:ComputationNode) ON (n.id)",
+        ]
+        for label in self.business_labels:
+            statements.append(
+                f"CREATE INDEX {label.lower()}_uuid IF NOT EXISTS FOR (n:{label}) ON (n.uuid)"
+            )
+        computation_types = [relation_type.value for relation_type in ComputationRelationType]
+        for rel_type in computation_types:
+            statements.append(
+                f"CREATE INDEX rel_{rel_type.lower()}_graph_id IF NOT EXISTS "
+                f"FOR ()-[r:{rel_type}]-() ON (r.graph_id)"
+            )
+        for rel_type in [*computation_types, *self.relationship_types]:
+            statements.append(
+                f"CREATE INDEX rel_{rel_type.lower()}_uuid IF NOT EXISTS "
+                f"FOR ()-[r:{rel_type}]-() ON (r.uuid)"
+            )
+        return statements
+
+    async def ensure_schema(self) -> List[str]:
+        """
+        Idempotently create the indexes and constraints used by loaders and writers (see
+        get_schema_statements). Safe to call on every start-up. Returns the executed statements.
+        """
+        statements = self.get_schema_statements()
+        driver = self.data_provider._get_driver() if self.data_provider else None
+        if not driver:
+            return []
+        async with driver.session() as session:
+            for statement in statements:
+                result = await session.run(statement)
+                await result.consume()
+        logger.info("Ensured %d Neo4j indexes/constraints", len(statements))
+        return statements
+
     async def create_business_nodes(
         self, specs: Dict[str, Dict]
     ) -> Dict[str, str]:
@@ -70,58 +160,98 @@ class Neo4jGraphManager:
         return data_node_id_map
 
     async def load_data_nodes_from_neo4j(
-        self, uuids: Iterable[str]
+        self,
+        uuids: Iterable[str],
+        *,
+        properties: Optional[Mapping[str, Iterable[str]]] = None,
+        read_batch_size: int = DEFAULT_LOAD_BATCH_SIZE,
+        write_batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
     ) -> Dict[str, Dict]:
         """
         Per computation graph need: read properties from nodes (any label) by uuid,
         then materialize into DataNodes in Neo4j. Only these DataNodes are connected to ComputationNodes.
 
-        Flow: find source node by uuid -> get properties -> MERGE DataNode with that data
-        -> return node_data_map (keyed by uuid, for executor).
+        Flow: bulk-read source nodes by uuid (UNWIND, read_batch_size uuids per query) -> MERGE DataNodes
+        with that data in chunked transactions of write_batch_size -> return node_data_map (keyed by uuid).
+        properties: Optional projection uuid -> property names to fetch (uuids not in it fetch everything).
+            With a projection, existing DataNodes only get the fetched properties added / updated
+            (SET n += ...); their other properties are kept.
         """
-        node_data_map: Dict[str, Dict] = {}
+        uuids = list(uuids)
+        props_by_uuid = await self.data_provider.get_data_nodes_by_uuids(
+            uuids,
+            properties=properties,
+            labels=self.business_labels,
+            relationship_types=self.relationship_types,
+            batch_size=read_batch_size,
+            concurrency=self.load_concurrency,
+        )
         for uuid in uuids:
-            # Read from business node (Order, Invoice, etc.) by uuid
-            result = await self.data_provider.get_data_node_by_uuid(uuid)
-            if result is None:
+            if uuid not in props_by_uuid:
                 logger.warning("Node with uuid '%s' not found in Neo4j, skipping.", uuid)
-                continue
-            props = result if isinstance(result, dict) else result[1]
-            # Materialize into DataNode in Neo4j (MERGE by uuid); computation graph links to DataNode only
-            data_node_uuid_id = await self.data_provider.merge_data_node(
-                uuid, {**props, "uuid": uuid}
-            )
-            if data_node_uuid_id is None:
-                continue
-            node_data_map[uuid] = props
-        return node_data_map
+        # Materialize into DataNodes in Neo4j (MERGE by uuid); computation graph links to DataNode only
+        stats = await self.data_provider.merge_data_nodes(
+            props_by_uuid, batch_size=write_batch_size, replace=properties is None
+        )
+        logger.info(
+            "Materialized %d/%d DataNodes in %d batches (%.3fs)",
+            stats.written, stats.requested, stats.batches, stats.seconds,
+        )
+        return {uuid: dict(props) for uuid, props in props_by_uuid.items()}
 
     async def load_data_nodes_from_neo4j_by_mapping(
-        self, data_node_id_to_neo4j_uuid: Dict[str, str]
+        self,
+        data_node_id_to_neo4j_uuid: Dict[str, str],
+        *,
+        properties: Optional[Mapping[str, Iterable[str]]] = None,
+        read_batch_size: int = DEFAULT_LOAD_BATCH_SIZE,
     ) -> Dict[str, Dict]:
         """
         根据「计算图数据节点 ID -> Neo4j 中节点/关系的 uuid」映射，从 Neo4j 拉取对应属性，
         填充到以数据节点 ID 为 key 的 node_data_map，供计算图执行器使用。
+        全部 uuid 以分块 UNWIND 查询批量读取（每块一次节点查询 + 一次关系查询），而不是逐个往返。
 
         Args:
             data_node_id_to_neo4j_uuid: 计算图中数据节点 ID 到 Neo4j uuid 的映射
                 (例如 get_graph_datanode_uuids() 的返回值)。
+            properties: 可选投影，数据节点 ID -> 需要拉取的属性名；不在其中的数据节点拉取全部属性。
+            read_batch_size: 每个 UNWIND 读取查询包含的 uuid 数（与 load_data_nodes_from_neo4j 同名参数一致）。
 
         Returns:
             node_data_map: key 为数据节点 ID，value 为从 Neo4j 读到的属性 dict。
         """
+        projection: Optional[Dict[str, List[str]]] = None
+        if properties is not None:
+            # 多个数据节点映射到同一 uuid 时取属性并集；任一需要全部属性则该 uuid 拉取全部
+            projection = {}
+            fetch_all = set()
+            for data_node_id, neo4j_uuid in data_node_id_to_neo4j_uuid.items():
+                if data_node_id not in properties:
+                    fetch_all.add(neo4j_uuid)
+                    continue
+                keys = projection.setdefault(neo4j_uuid, [])
+                keys.extend(k for k in properties[data_node_id] if k not in keys)
+            for neo4j_uuid in fetch_all:
+                projection.pop(neo4j_uuid, None)
+        props_by_uuid = await self.data_provider.get_data_nodes_by_uuids(
+            data_node_id_to_neo4j_uuid.values(),
+            properties=projection,
+            labels=self.business_labels,
+            relationship_types=self.relationship_types,
+            batch_size=read_batch_size,
+            concurrency=self.load_concurrency,
+        )
         node_data_map: Dict[str, Dict] = {}
         for data_node_id, neo4j_uuid in data_node_id_to_neo4j_uuid.items():
-            result = await self.data_provider.get_data_node_by_uuid(neo4j_uuid)
-            if result is None:
+            props = props_by_uuid.get(neo4j_uuid)
+            if props is None:
                 logger.warning(
                     "Neo4j node/rel with uuid '%s' (data_node_id=%s) not found, skipping.",
                     neo4j_uuid,
                     data_node_id,
                 )
                 continue
-            props = result if isinstance(result, dict) else result[1]
-            node_data_map[data_node_id] = props
+            node_data_map[data_node_id] = dict(props)
         return node_data_map
 
     async def load_graph_data_from_neo4j(
@@ -130,6 +260,7 @@ class Neo4jGraphManager:
         *,
         extra_data_node_ids: Optional[Iterable[str]] = None,
         data_node_id_to_neo4j_uuid: Optional[Dict[str, str]] = None,
+        all_properties: bool = False,
     ) -> Dict[str, Dict]:
         """
         Load data nodes for a computation graph from Neo4j by uuid.
@@ -143,49 +274,126 @@ class Neo4jGraphManager:
                 When provided, Neo4j is queried by these uuids and the result is keyed by data
                 node id (e.g. from get_graph_datanode_uuids()). When None, data node ids are
                 used directly as Neo4j uuid.
+            all_properties: By default only the properties the graph reads or writes are fetched
+                (graph.get_required_properties_by_data_node(); data nodes without any such property,
+                e.g. extra ones, fetch everything). Set True to fetch all properties of every node.
 
         Returns:
             node_data_map for use with ComputationGraphExecutor (keys = data node ids).
         """
         data_node_ids = set(graph.get_data_node_ids()) | set(extra_data_node_ids or ())
-        if data_node_id_to_neo4j_uuid is not None:
-            # 仅对图中用到的数据节点做映射；未在映射中的仍用 data_node_id 作为 uuid 查询
-            mapping = {
-                did: data_node_id_to_neo4j_uuid.get(did, did) for did in data_node_ids
+        properties = None if all_properties else graph.get_required_properties_by_data_node()
+        span = (
+            self.tracer.span("neo4j.load", "neo4j", graph_id=graph.id, data_nodes=len(data_node_ids))
+            if self.tracer is not None else nullcontext()
+        )
+        with span:
+            if data_node_id_to_neo4j_uuid is not None:
+                # 仅对图中用到的数据节点做映射；未在映射中的仍用 data_node_id 作为 uuid 查询
+                mapping = {
+                    did: data_node_id_to_neo4j_uuid.get(did, did) for did in data_node_ids
+                }
+                node_data_map = await self.load_data_nodes_from_neo4j_by_mapping(
+                    mapping, properties=properties
+                )
+            else:
+                node_data_map = await self.load_data_nodes_from_neo4j(
+                    data_node_ids, properties=properties
+                )
+        missing = set(data_node_ids) - set(node_data_map.keys())
+        if missing:
+            raise ValueError(
+                f"Missing data nodes in Neo4j for graph: {sorted(missing)}. "
+                "Create business nodes (e.g. via create_business_nodes or seed) before loading."
+            )
+        return node_data_map
+
+    async def load_graph_data_cached(
+        self,
+        graph: ComputationGraph,
+        cache: NodeDataCache,
+        *,
+        extra_data_node_ids: Optional[Iterable[str]] = None,
+        data_node_id_to_neo4j_uuid: Optional[Dict[str, str]] = None,
+        all_properties: bool = False,
+        stamp_property: str = "updated_at",
+    ) -> Dict[str, Dict]:
+        """
+        Like load_graph_data_from_neo4j, but backed by a local NodeDataCache: the current version stamps
+        (stamp_property, e.g. updated_at) of all data nodes are read in one bulk query; nodes whose stamp
+        matches the cached one are served from disk, only stale / unstamped / uncached nodes are refetched.
+        The refreshed entries are written back to the cache.
+        Unlike load_data_nodes_from_neo4j, this does not materialize DataNodes (read-only load).
+        Raises ValueError if any required data nodes are missing in Neo4j.
+        """
+        data_node_ids = set(graph.get_data_node_ids()) | set(extra_data_node_ids or ())
+        mapping = {
+            did: (data_node_id_to_neo4j_uuid or {}).get(did, did) for did in sorted(data_node_ids)
+        }
+        properties = None if all_properties else graph.get_required_properties_by_data_node()
+        key = cache.make_key(graph.id, mapping, properties)
+        span = (
+            self.tracer.span("neo4j.load_cached", "neo4j", graph_id=graph.id, data_nodes=len(mapping))
+            if self.tracer is not None else nullcontext()
+        )
+        with span:
+            stamp_rows = await self.data_provider.get_data_nodes_by_uuids(
+                mapping.values(),
+                properties={uuid: [stamp_property] for uuid in mapping.values()},
+                labels=self.business_labels,
+                relationship_types=self.relationship_types,
+                concurrency=self.load_concurrency,
+            )
+            stamps = {
+                did: stamp_rows[uuid].get(stamp_property)
+                for did, uuid in mapping.items()
+                if uuid in stamp_rows
             }
-            node_data_map = await self.load_data_nodes_from_neo4j_by_mapping(mapping)
-        else:
-            node_data_map = await self.load_data_nodes_from_neo4j(data_node_ids)
+            entries = cache.load(graph.id, key)
+            node_data_map, stale = cache.split_fresh(entries, stamps)
+            cached_count = len(node_data_map)
+            if stale:
+                refetched = await self.load_data_nodes_from_neo4j_by_mapping(
+                    {did: mapping[did] for did in stale}, properties=properties
+                )
+                node_data_map.update(refetched)
+            logger.info(
+                "Loaded %d data nodes from cache, refetched %d from Neo4j", cached_count, len(stale)
+            )
         missing = set(data_node_ids) - set(node_data_map.keys())
         if missing:
             raise ValueError(
                 f"Missing data nodes in Neo4j for graph: {sorted(missing)}. "
                 "Create business nodes (e.g. via create_business_nodes or seed) before loading."
             )
+        cache.save(graph.id, key, {did: (stamps.get(did), props) for did, props in node_data_map.items()})
         return node_data_map
 
     async def sync_graph_to_neo4j(
         self,
         graph: ComputationGraph,
         node_data_map: Optional[Dict[str, Dict]] = None,
+        *,
+        batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
     ) -> Dict[str, Dict]:
         """
         将数据节点、计算节点、计算关系同步到 Neo4j，便于在 Browser 中可视化。
-        一步完成：同步 DataNode -> 创建 ComputationNode -> 创建关系。
+        一步完成：同步 DataNode -> 创建 ComputationNode -> 创建关系；
+        每一步都以参数化 UNWIND 按 batch_size 分批写入，每批一个事务。
 
-        - 若 node_data_map 为 None：从 Neo4j 按 graph 的 data node uuid 加载数据并物化 DataNode，
-          缺失节点会抛出 ValueError。
+        - 若 node_data_map 为 None：从 Neo4j 按 graph 的 data node uuid 加载全部属性（不做投影）并物化 DataNode，
+          便于可视化完整数据；缺失节点会抛出 ValueError。
         - 若提供 node_data_map：用 ensure_data_nodes_from_map 将内存中的数据同步为 DataNode。
 
         Returns:
             node_data_map，供 ComputationGraphExecutor 使用。
         """
         if node_data_map is None:
-            node_data_map = await self.load_graph_data_from_neo4j(graph)
+            node_data_map = await self.load_graph_data_from_neo4j(graph, all_properties=True)
         else:
-            await self.ensure_data_nodes_from_map(node_data_map, graph_id=graph.id)
-        await self.create_computation_nodes(graph)
-        await self.create_relationships(graph)
+            await self.ensure_data_nodes_from_map(node_data_map, graph_id=graph.id, batch_size=batch_size)
+        await self.create_computation_nodes(graph, batch_size=batch_size)
+        await self.create_relationships(graph, batch_size=batch_size)
         return node_data_map
 
     async def clear_graph_from_neo4j(self, graph: ComputationGraph) -> None:
@@ -219,19 +427,29 @@ class Neo4jGraphManager:
         self,
         node_data_map: Dict[str, Dict],
         graph_id: Optional[str] = None,
-    ) -> None:
+        *,
+        batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+    ) -> Optional[BulkWriteStats]:
         """
         Create or update DataNode nodes in Neo4j from a node_data_map (e.g. in-memory data).
         Use when the graph is not loaded from Neo4j but you want to visualize data + computation in Neo4j.
         Optionally set graph_id on each DataNode for filtering.
+        DataNodes are MERGEd with UNWIND in chunked transactions of batch_size; returns the write stats.
         """
         if not self.data_provider:
-            return
+            return None
+        nodes: Dict[str, Dict] = {}
         for uuid, props in node_data_map.items():
             p = {**props, "uuid": uuid}
             if graph_id is not None:
                 p["graph_id"] = graph_id
-            await self.data_provider.merge_data_node(uuid, p)
+            nodes[uuid] = p
+        stats = await self.data_provider.merge_data_nodes(nodes, batch_size=batch_size)
+        logger.info(
+            "Synced %d/%d DataNodes in %d batches (%.3fs)",
+            stats.written, stats.requested, stats.batches, stats.seconds,
+        )
+        return stats
 
     def get_visualization_cypher(self, graph: ComputationGraph) -> Tuple[str, Dict]:
         """
@@ -254,15 +472,22 @@ class Neo4jGraphManager:
         """
         return query.strip(), {"data_uuids": data_uuids, "graph_id": graph.id}
 
-    async def create_computation_nodes(self, graph: ComputationGraph) -> Dict[str, str]:
-        """Create computation nodes in Neo4j
+    async def create_computation_nodes(
+        self,
+        graph: ComputationGraph,
+        *,
+        batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+    ) -> Dict[str, str]:
+        """Create computation nodes in Neo4j (parameterized UNWIND batches, one transaction per batch)
 
         Returns:
             Mapping of logical node IDs to Neo4j node IDs
         """
-        self.comp_node_id_map = {}
-        for node_id, node in graph.computation_nodes.items():
-            node_props = {
+        node_ids = list(graph.computation_nodes)
+        props_list = []
+        for node_id in node_ids:
+            node = graph.computation_nodes[node_id]
+            props_list.append({
                 "id": node.id,
                 "name": node.name,
                 "level": node.level.value,
@@ -273,15 +498,26 @@ class Neo4jGraphManager:
                 "graph_id": graph.id,
                 "is_computation": True,
                 "priority": node.priority,
-            }
-            neo4j_id = await self.data_provider.create_node("ComputationNode", node_props)
-            self.comp_node_id_map[node_id] = neo4j_id
+            })
+        neo4j_ids = await self.data_provider.create_nodes(
+            "ComputationNode", props_list, batch_size=batch_size
+        )
+        self.comp_node_id_map = dict(zip(node_ids, neo4j_ids))
         return self.comp_node_id_map
 
-    async def create_relationships(self, graph: ComputationGraph):
-        """Create relationships between nodes in Neo4j.
+    async def create_relationships(
+        self,
+        graph: ComputationGraph,
+        *,
+        batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+    ) -> int:
+        """Create relationships between nodes in Neo4j, batched per relationship type (UNWIND).
         DataNode endpoints use uuid (match_by_uuid); ComputationNode use elementId.
+
+        Returns:
+            Number of relationships created.
         """
+        rows_by_type: Dict[ComputationRelationType, List[Tuple[str, str, Dict]]] = {}
         for rel in graph.computation_relationships.values():
             if rel.relation_type == ComputationRelationType.DEPENDS_ON:
                 source_id = rel.source_id  # DataNode uuid
@@ -302,17 +538,18 @@ class Neo4jGraphManager:
                     rel_props["datasource"] = f"{rel.datasource.entity_type}.{rel.datasource.property_name}"
                 if hasattr(rel, "data_output") and rel.data_output:
                     rel_props["data_output"] = f"{rel.data_output.entity_type}.{rel.data_output.property_name}"
-
-                source_by_uuid = rel.relation_type == ComputationRelationType.DEPENDS_ON
-                target_by_uuid = rel.relation_type == ComputationRelationType.OUTPUT_TO
-                await self.data_provider.create_relationship(
-                    source_id,
-                    target_id,
-                    rel.relation_type.value,
-                    rel_props,
-                    source_match_by_uuid=source_by_uuid,
-                    target_match_by_uuid=target_by_uuid,
-                )
+                rows_by_type.setdefault(rel.relation_type, []).append((source_id, target_id, rel_props))
+
+        created = 0
+        for relation_type, rows in rows_by_type.items():
+            created += await self.data_provider.create_relationships(
+                relation_type.value,
+                rows,
+                source_match_by_uuid=relation_type == ComputationRelationType.DEPENDS_ON,
+                target_match_by_uuid=relation_type == ComputationRelationType.OUTPUT_TO,
+                batch_size=batch_size,
+            )
+        return created
 
     async def write_output_properties(self, node_uuid: str, node_data: Dict,
                                    output_properties: List[str] = None):
@@ -324,6 +561,53 @@ class Neo4jGraphManager:
             node_uuid, output_props, match_by_uuid=True
         )
 
+    async def write_back_diff(
+        self,
+        diff: Iterable[Mapping[str, Any]],
+        *,
+        batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+    ) -> BulkWriteStats:
+        """
+        Write only changed properties back to Neo4j DataNodes (matched by uuid = node_id).
+        diff: entries with node_id / property_name / scenario_value, e.g. ScenarioRunResult.diff.
+        Changes are grouped by DataNode and written with UNWIND batches inside one transaction.
+        """
+        updates: Dict[str, Dict[str, Any]] = {}
+        for entry in diff:
+            updates.setdefault(entry["node_id"], {})[entry["property_name"]] = entry["scenario_value"]
+        stats = await self.data_provider.set_data_node_properties_bulk(updates, batch_size=batch_size)
+        logger.info(
+            "Wrote back %d/%d changed DataNodes in %d batches (%.3fs)",
+            stats.written, stats.requested, stats.batches, stats.seconds,
+        )
+        return stats
+
+    async def write_back_state(
+        self,
+        state: Mapping[str, Mapping[str, Any]],
+        baseline: Mapping[str, Mapping[str, Any]],
+        output_properties: Optional[Iterable[str]] = None,
+        *,
+        batch_size: int = DEFAULT_WRITE_BATCH_SIZE,
+    ) -> BulkWriteStats:
+        """
+        Write the properties of state (e.g. executor.export_node_data_map()) that differ from baseline
+        (e.g. the node_data_map loaded from Neo4j) back to the DataNodes; see write_back_diff.
+        output_properties: Optional property names to consider (default: every property in state).
+        Executor-internal node attributes (priority, is_computation) are always ignored, so
+        executor.get_all_data_nodes() can be passed as state too.
+        """
+        allowed = set(output_properties) if output_properties is not None else None
+        diff = []
+        for node_id, props in state.items():
+            before = baseline.get(node_id, {})
+            for prop, value in props.items():
+                if prop in _EXECUTOR_INTERNAL_KEYS or (allowed is not None and prop not in allowed):
+                    continue
+                if prop not in before or before[prop] != value:
+                    diff.append({"node_id": node_id, "property_name": prop, "scenario_value": value})
+        return await self.write_back_diff(diff, batch_size=batch_size)
+
     async def print_graph_structure(self):
         """Query and print graph structure from Neo4j"""
         driver = self.data_provider._get_driver()
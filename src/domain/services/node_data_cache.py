@@ -0,0 +1,114 @@
+"""
+node_data_map 本地磁盘缓存：服务重启时从磁盘恢复数据节点属性，只向 Neo4j 重新拉取已变化的节点。
+
+- 缓存文件按 (graph_id, 数据节点 ID -> uuid 映射, 属性投影) 求键，每个键一个 pickle 文件（紧凑二进制）。
+- 每个数据节点连同其版本戳（如业务节点的 updated_at 属性）一起保存；加载时先批量查询当前版本戳，
+  版本戳相同的节点直接使用磁盘数据，其余（包括没有版本戳的节点）重新拉取。
+- 写入先写临时文件再 os.replace，进程中断不会留下半个缓存文件；无法读取的缓存文件视为空缓存。
+- 缓存内容来自本机可信来源（Neo4j），pickle 文件不应来自不可信位置。
+"""
+
+import hashlib
+import logging
+import os
+import pickle
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Bump when the on-disk layout changes; files with another version are ignored
+CACHE_FORMAT_VERSION = 1
+
+
+class NodeDataCache:
+    """按计算图与 uuid 集合划分的 node_data_map 磁盘缓存，条目为 数据节点 ID -> (版本戳, 属性)。"""
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def make_key(
+        graph_id: str,
+        uuid_by_data_node: Mapping[str, str],
+        projection: Optional[Mapping[str, Iterable[str]]] = None,
+    ) -> str:
+        """由 graph_id、数据节点 ID -> uuid 映射与属性投影（None 表示全部属性）计算缓存键（sha1 十六进制）。"""
+        digest = hashlib.sha1()
+        digest.update(repr(graph_id).encode("utf-8"))
+        digest.update(repr(sorted(uuid_by_data_node.items())).encode("utf-8"))
+        if projection is None:
+            digest.update(b"*")
+        else:
+            digest.update(repr(sorted((k, sorted(v)) for k, v in projection.items())).encode("utf-8"))
+        return digest.hexdigest()
+
+    def path_for(self, graph_id: str, key: str) -> str:
+        """缓存文件路径：<directory>/<graph_id 的安全形式>-<key 前 16 位>.pkl。"""
+        safe_id = "".join(c if c.isalnum() or c in "-_" else "_" for c in graph_id)
+        return os.path.join(self.directory, f"{safe_id}-{key[:16]}.pkl")
+
+    def load(self, graph_id: str, key: str) -> Dict[str, Tuple[Any, Dict[str, Any]]]:
+        """读取缓存条目；文件不存在、格式版本或键不符、无法反序列化时返回空 dict。"""
+        path = self.path_for(graph_id, key)
+        try:
+            with open(path, "rb") as f:
+                payload = pickle.load(f)
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            logger.warning("Ignoring unreadable node data cache %s: %s", path, e)
+            return {}
+        if (
+            not isinstance(payload, dict)
+            or payload.get("version") != CACHE_FORMAT_VERSION
+            or payload.get("key") != key
+        ):
+            return {}
+        return payload["entries"]
+
+    def save(
+        self,
+        graph_id: str,
+        key: str,
+        entries: Mapping[str, Tuple[Any, Dict[str, Any]]],
+    ) -> str:
+        """原子写入缓存条目（临时文件 + os.replace），返回缓存文件路径。"""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(graph_id, key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        payload = {"version": CACHE_FORMAT_VERSION, "key": key, "entries": dict(entries)}
+        with open(tmp_path, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+        return path
+
+    def split_fresh(
+        self,
+        entries: Mapping[str, Tuple[Any, Dict[str, Any]]],
+        stamps: Mapping[str, Any],
+    ) -> Tuple[Dict[str, Dict[str, Any]], List[str]]:
+        """
+        按当前版本戳划分：返回 (可直接使用的 数据节点 ID -> 属性, 需要重新拉取的数据节点 ID 列表)。
+        stamps 为 数据节点 ID -> 当前版本戳；版本戳为 None 或与缓存不同的节点视为过期。
+        """
+        fresh: Dict[str, Dict[str, Any]] = {}
+        stale: List[str] = []
+        for data_node_id, stamp in stamps.items():
+            cached = entries.get(data_node_id)
+            if stamp is not None and cached is not None and cached[0] == stamp:
+                fresh[data_node_id] = dict(cached[1])
+            else:
+                stale.append(data_node_id)
+        self.hits += len(fresh)
+        self.misses += len(stale)
+        return fresh, stale
+
+    def clear(self) -> None:
+        """删除目录下全部缓存文件。"""
+        if not os.path.isdir(self.directory):
+            return
+        for name in os.listdir(self.directory):
+            if name.endswith(".pkl"):
+                os.remove(os.path.join(self.directory, name))
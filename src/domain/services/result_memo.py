@@ -0,0 +1,95 @@
+"""
+计算节点结果记忆化：跨场景复用输入未变的节点结果，命中时跳过 eval。
+
+- 每个计算节点一个有界 LRU，键为 (code_hash, 输入变量值元组)；值的类型也计入键，避免 1 与 1.0 互相命中。
+- 输入含不可哈希值（list、dict 等）时不缓存，计为 uncacheable。
+- 代码不纯的节点（如使用 datetime.now()）可通过 ComputationNode.properties["memoize"] = False 退出。
+- 缓存的结果在多次执行间共享，节点结果应为不可变值（数值、字符串、datetime 等）。
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional
+
+# Default LRU capacity per computation node
+DEFAULT_MEMO_SIZE = 1024
+
+_MISS = object()
+
+
+@dataclass
+class MemoStats:
+    """单个计算节点的记忆化计数：命中、未命中、不可缓存次数与当前条目数。"""
+    hits: int = 0
+    misses: int = 0
+    uncacheable: int = 0
+    entries: int = 0
+
+
+class NodeResultMemo:
+    """按计算节点划分的有界 LRU 结果缓存，附带命中/未命中计数。"""
+
+    def __init__(self, max_entries_per_node: int = DEFAULT_MEMO_SIZE):
+        if max_entries_per_node < 1:
+            raise ValueError(f"max_entries_per_node must be >= 1, got {max_entries_per_node}")
+        self.max_entries_per_node = max_entries_per_node
+        self._caches: Dict[str, "OrderedDict[Hashable, Any]"] = {}
+        self._stats: Dict[str, MemoStats] = {}
+
+    @staticmethod
+    def make_key(code_hash: str, variables: Dict[str, Any]) -> Optional[Hashable]:
+        """由代码哈希与输入变量构造缓存键；输入不可哈希时返回 None。"""
+        key = (code_hash, tuple((name, type(value), value) for name, value in variables.items()))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    def lookup(self, node_id: str, key: Optional[Hashable]) -> Any:
+        """查找缓存结果；未命中返回模块内哨兵（用 is_miss 判断）。key 为 None 时计为 uncacheable。"""
+        stats = self._stats.setdefault(node_id, MemoStats())
+        if key is None:
+            stats.uncacheable += 1
+            return _MISS
+        cache = self._caches.get(node_id)
+        if cache is not None and key in cache:
+            cache.move_to_end(key)
+            stats.hits += 1
+            return cache[key]
+        stats.misses += 1
+        return _MISS
+
+    @staticmethod
+    def is_miss(value: Any) -> bool:
+        """lookup 的返回值是否表示未命中。"""
+        return value is _MISS
+
+    def store(self, node_id: str, key: Optional[Hashable], value: Any) -> None:
+        """写入缓存（超过容量时淘汰该节点最久未用的条目）；key 为 None 时忽略。"""
+        if key is None:
+            return
+        cache = self._caches.setdefault(node_id, OrderedDict())
+        cache[key] = value
+        if len(cache) > self.max_entries_per_node:
+            cache.popitem(last=False)
+        self._stats.setdefault(node_id, MemoStats()).entries = len(cache)
+
+    @property
+    def hits(self) -> int:
+        """全部节点的命中总数。"""
+        return sum(s.hits for s in self._stats.values())
+
+    @property
+    def misses(self) -> int:
+        """全部节点的未命中总数。"""
+        return sum(s.misses for s in self._stats.values())
+
+    def stats(self) -> Dict[str, MemoStats]:
+        """按计算节点 ID 返回计数快照。"""
+        return {node_id: MemoStats(**vars(s)) for node_id, s in self._stats.items()}
+
+    def clear(self) -> None:
+        """清空缓存与计数。"""
+        self._caches.clear()
+        self._stats.clear()
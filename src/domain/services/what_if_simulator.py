@@ -1,18 +1,30 @@
 """
 What-If 模拟器：在内存中应用属性变更、重跑计算图并对比结果，不持久化、不修改执行器原始状态。
 
-流程：snapshot -> 对 executor 应用 property_changes -> execute -> 收集 scenario 与 diff -> restore。
+流程：开启覆盖层 -> 对 executor 应用 property_changes -> execute（或 incremental 时仅重算下游影响锥）
+-> 由覆盖层 delta 计算 diff -> 丢弃覆盖层（O(1)，基线未被修改，无需快照/恢复）。
+基线取自执行器缓存的基线快照（get_baseline_snapshot，基线变化后才重建），各场景共享，不按场景复制。
+scenario 为 ScenarioState：基线与本场景 delta 的只读合成视图（Mapping，非 dict；to_dict() 得到普通 dict），
+每个结果只保存 delta，不复制全部数据节点。
 返回 ScenarioRunResult（baseline、scenario、diff、overrides、affected_node_ids、outputs_per_node 等）。
+run_scenarios / iter_scenarios 批量评估多组变更：基线状态与执行计划只计算一次，各场景共享。
+run_scenarios_parallel 将计算图与基线 node_data_map 一次性发送到进程池的每个 worker，按批分发场景并汇总结果。
+可选 tracer（TraceRecorder）：每个场景、每次 diff 计算与每个计算节点执行各记录一个 span，可导出 Chrome trace。
 """
 
+import asyncio
 import logging
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import nullcontext
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence, Tuple
 
 logger = logging.getLogger(__name__)
 
 from .computation_graph_executor import ComputationGraphExecutor
 from .neo4j_graph_manager import Neo4jGraphManager
+from .result_memo import NodeResultMemo
+from .tracing import TraceRecorder
 
 
 @dataclass
@@ -51,6 +63,31 @@ def _compute_diff(
     return diff
 
 
+def _compute_overlay_diff(
+    baseline: Dict[str, Dict[str, Any]],
+    delta: Dict[str, Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """
+    Same result as _compute_diff(baseline, scenario) when scenario = baseline + delta, but only visits
+    the properties written during the scenario. Nodes absent from baseline (e.g. computation nodes) are skipped.
+    """
+    diff: List[Dict[str, Any]] = []
+    for node_id, props in delta.items():
+        if node_id not in baseline:
+            continue
+        b_props = baseline[node_id]
+        for prop, s_val in props.items():
+            b_val = b_props.get(prop)
+            if b_val != s_val:
+                diff.append({
+                    "node_id": node_id,
+                    "property_name": prop,
+                    "baseline_value": b_val,
+                    "scenario_value": s_val,
+                })
+    return diff
+
+
 def _property_changes_to_overrides(
     property_changes: List[Tuple[str, str, Any]],
 ) -> Dict[str, Dict[str, Any]]:
@@ -78,12 +115,58 @@ def _build_outputs_per_node(
     return out
 
 
+class ScenarioState(Mapping):
+    """
+    Read-through scenario state: node_id -> { prop -> value } = baseline overlaid with the scenario delta.
+    Only the delta (properties written during the scenario) is stored; the baseline dict is shared, so
+    per-scenario memory scales with what changed. Reading a node returns a fresh dict (merged for
+    nodes in the delta); the view compares equal to the equivalent plain dict.
+    Not a dict subclass: use to_dict() where a real dict is required (e.g. json.dumps).
+    """
+
+    __slots__ = ("baseline", "delta")
+
+    def __init__(self, baseline: Mapping[str, Dict[str, Any]], delta: Mapping[str, Dict[str, Any]]):
+        self.baseline = baseline
+        self.delta = delta
+
+    def __getitem__(self, node_id: str) -> Dict[str, Any]:
+        props = dict(self.baseline[node_id])
+        props.update(self.delta.get(node_id, {}))
+        return props
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.baseline)
+
+    def __len__(self) -> int:
+        return len(self.baseline)
+
+    def __contains__(self, node_id: object) -> bool:
+        return node_id in self.baseline
+
+    def to_dict(self) -> Dict[str, Dict[str, Any]]:
+        """Materialize the full scenario state as a plain node_id -> { prop -> value } dict."""
+        return {node_id: self[node_id] for node_id in self.baseline}
+
+    def with_baseline(self, baseline: Mapping[str, Dict[str, Any]]) -> "ScenarioState":
+        """Same delta on top of another (equal) baseline, e.g. the parent's copy after a worker process."""
+        return ScenarioState(baseline, self.delta)
+
+    def __repr__(self) -> str:
+        return f"ScenarioState(nodes={len(self.baseline)}, changed_nodes={len(self.delta)})"
+
+
 @dataclass
 class ScenarioRunResult:
-    """Result of a single scenario run: baseline state, scenario state, diff, and structured metadata."""
+    """
+    Result of a single scenario run: baseline state, scenario state, diff, and structured metadata.
+    baseline is the executor's cached baseline snapshot, shared by every result taken from the same
+    baseline (treat it as read-only). scenario is a ScenarioState Mapping, not a dict: call
+    to_dict() (or scenario.to_dict()) for JSON / API output.
+    """
 
-    baseline: Dict[str, Dict[str, Any]]  # node_id -> { prop -> value }
-    scenario: Dict[str, Dict[str, Any]]
+    baseline: Dict[str, Dict[str, Any]]  # node_id -> { prop -> value }; shared, read-only
+    scenario: Mapping[str, Dict[str, Any]]  # ScenarioState: baseline + delta, read-through (no full copy)
     diff: List[Dict[str, Any]]  # [{"node_id", "property_name", "baseline_value", "scenario_value"}, ...]
     # Extended fields for API/UI and multi-scenario comparison
     overrides: Dict[str, Dict[str, Any]] = field(default_factory=dict)  # node_id -> { prop -> value } applied in this run
@@ -92,6 +175,19 @@ class ScenarioRunResult:
     errors: List[NodeError] = field(default_factory=list)  # computation errors during execute
     success: bool = True  # False if any computation node failed
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Plain-dict form for API/UI serialization (scenario materialized, errors as node_id/message)."""
+        return {
+            "baseline": {node_id: dict(props) for node_id, props in self.baseline.items()},
+            "scenario": {node_id: self.scenario[node_id] for node_id in self.scenario},
+            "diff": [dict(d) for d in self.diff],
+            "overrides": {node_id: dict(props) for node_id, props in self.overrides.items()},
+            "outputs_per_node": {node_id: dict(props) for node_id, props in self.outputs_per_node.items()},
+            "affected_node_ids": list(self.affected_node_ids),
+            "errors": [{"node_id": e.node_id, "message": e.message} for e in self.errors],
+            "success": self.success,
+        }
+
 
 def format_scenario_result(
     result: ScenarioRunResult,
@@ -132,12 +228,63 @@ def format_scenario_result(
     out("")
 
 
+# Per-process state of a parallel scenario worker (set once by _init_scenario_worker)
+_worker_simulator: Optional["WhatIfSimulator"] = None
+_worker_baseline: Dict[str, Dict[str, Any]] = {}
+
+
+def _init_scenario_worker(
+    graph: Any,
+    node_data_map: Dict[str, Dict],
+    memo_size: Optional[int] = None,
+) -> None:
+    """Process-pool initializer: build the worker's executor and baseline once from the shipped graph/state."""
+    global _worker_simulator, _worker_baseline
+    memo = NodeResultMemo(memo_size) if memo_size is not None else None
+    executor = ComputationGraphExecutor(graph, node_data_map, memo=memo)
+    executor.get_execution_plan()
+    _worker_simulator = WhatIfSimulator(executor, neo4j_manager=None)
+    _worker_baseline = executor.get_all_data_nodes()
+
+
+def _run_scenario_batch(
+    property_change_sets: List[List[Tuple[str, str, Any]]],
+    incremental: bool,
+) -> List[ScenarioRunResult]:
+    """Evaluate a batch of change sets in a worker. baseline is left empty; the parent fills in its own copy."""
+    results = []
+    for property_changes in property_change_sets:
+        result = _worker_simulator._evaluate_scenario(
+            property_changes, _worker_baseline, "", verbose=False, incremental=incremental
+        )
+        result.baseline = {}
+        result.scenario = result.scenario.with_baseline({})  # ship only the delta back
+        results.append(result)
+    return results
+
+
 class WhatIfSimulator:
     """Handles what-if simulations for computation graphs"""
 
-    def __init__(self, executor: ComputationGraphExecutor, neo4j_manager: Neo4jGraphManager):
+    def __init__(
+        self,
+        executor: ComputationGraphExecutor,
+        neo4j_manager: Neo4jGraphManager,
+        *,
+        tracer: Optional[TraceRecorder] = None,
+    ):
         self.executor = executor
         self.neo4j_manager = neo4j_manager
+        # Optional TraceRecorder: spans per scenario and per diff, plus per-node spans via the executor profiler
+        self.tracer = tracer
+        if tracer is not None:
+            tracer.attach(executor)
+
+    def _span(self, name: str, cat: str, **args: Any):
+        """tracer 已设置时返回记录 span 的上下文管理器，否则返回空上下文。"""
+        if self.tracer is None:
+            return nullcontext()
+        return self.tracer.span(name, cat, **args)
 
     async def run_scenario(
         self,
@@ -145,51 +292,165 @@ class WhatIfSimulator:
         title: str = "Scenario",
         *,
         verbose: bool = False,
+        incremental: bool = False,
     ) -> ScenarioRunResult:
         """
-        Run one scenario in isolation: apply the given property changes, re-execute, then restore executor state.
-        Does not modify executor in-memory values; returns baseline, scenario state, and the diff between them.
+        Run one scenario in isolation: apply the given property changes inside a copy-on-write overlay,
+        re-execute, then discard the overlay. Does not modify executor in-memory values; returns baseline, scenario state, and the diff between them.
 
         Args:
             property_changes: List of (node_id, property_name, new_value) to apply for this run.
             title: Optional title for optional console summary of the diff.
             verbose: If True, log the computation process (each node execution and result) during scenario run.
+            incremental: If True, only re-execute computation nodes downstream of the changed properties
+                (requires the executor to hold a fully executed baseline).
 
         Returns:
             ScenarioRunResult with baseline (state before scenario), scenario (state after execute),
             and diff (list of changed properties: node_id, property_name, baseline_value, scenario_value).
         """
-        snapshot = self.executor.snapshot_data_nodes()
-        baseline = self.executor.get_all_data_nodes()
-        try:
+        baseline = self.executor.get_baseline_snapshot()
+        return self._evaluate_scenario(
+            property_changes, baseline, title, verbose=verbose, incremental=incremental
+        )
+
+    async def run_scenarios(
+        self,
+        property_change_sets: Sequence[List[Tuple[str, str, Any]]],
+        titles: Optional[Sequence[str]] = None,
+        *,
+        verbose: bool = False,
+        incremental: bool = False,
+    ) -> List[ScenarioRunResult]:
+        """
+        Run many scenarios against one shared baseline: the baseline state and the execution plan are
+        computed once, then each change set is evaluated in its own overlay (see run_scenario).
+
+        Args:
+            property_change_sets: One list of (node_id, property_name, new_value) per scenario.
+            titles: Optional per-scenario titles for the console diff summary (default: no summary).
+            verbose: If True, log the computation process of every scenario.
+            incremental: If True, only re-execute computation nodes downstream of each scenario's changes.
+
+        Returns:
+            One ScenarioRunResult per change set, in input order. All results share the same baseline dict.
+        """
+        return list(self.iter_scenarios(
+            property_change_sets, titles, verbose=verbose, incremental=incremental
+        ))
+
+    async def run_scenarios_parallel(
+        self,
+        property_change_sets: Sequence[List[Tuple[str, str, Any]]],
+        *,
+        max_workers: Optional[int] = None,
+        batch_size: int = 16,
+        incremental: bool = False,
+        mp_context: Any = None,
+    ) -> List[ScenarioRunResult]:
+        """
+        Run many scenarios on a pool of worker processes. The computation graph and the current baseline
+        node_data_map are shipped to each worker once (pool initializer); change sets are sent in batches
+        of batch_size and the results are gathered in input order.
+
+        Args:
+            property_change_sets: One list of (node_id, property_name, new_value) per scenario.
+            max_workers: Number of worker processes (default: os.cpu_count()).
+            batch_size: Number of change sets per task sent to a worker.
+            incremental: If True, workers only re-execute the downstream cone of each scenario's changes.
+            mp_context: Optional multiprocessing context (e.g. multiprocessing.get_context("spawn")).
+
+        Returns:
+            One ScenarioRunResult per change set, in input order. All results share the same baseline dict.
+        """
+        if batch_size < 1:
+            raise ValueError(f"batch_size must be >= 1, got {batch_size}")
+        baseline = self.executor.get_baseline_snapshot()
+        change_sets = list(property_change_sets)
+        batches = [change_sets[i:i + batch_size] for i in range(0, len(change_sets), batch_size)]
+        loop = asyncio.get_running_loop()
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            mp_context=mp_context,
+            initializer=_init_scenario_worker,
+            initargs=(
+                self.executor.graph,
+                self.executor.export_node_data_map(),
+                self.executor.memo.max_entries_per_node if self.executor.memo is not None else None,
+            ),
+        ) as pool:
+            batch_results = await asyncio.gather(*(
+                loop.run_in_executor(pool, _run_scenario_batch, batch, incremental)
+                for batch in batches
+            ))
+        results = [result for batch in batch_results for result in batch]
+        for result in results:
+            result.baseline = baseline
+            result.scenario = result.scenario.with_baseline(baseline)
+        return results
+
+    def iter_scenarios(
+        self,
+        property_change_sets: Iterable[List[Tuple[str, str, Any]]],
+        titles: Optional[Sequence[str]] = None,
+        *,
+        verbose: bool = False,
+        incremental: bool = False,
+    ) -> Iterator[ScenarioRunResult]:
+        """Lazy variant of run_scenarios: yields each ScenarioRunResult as soon as it is evaluated."""
+        self.executor.get_execution_plan()
+        baseline = self.executor.get_baseline_snapshot()
+        for i, property_changes in enumerate(property_change_sets):
+            title = titles[i] if titles is not None else ""
+            yield self._evaluate_scenario(
+                property_changes, baseline, title, verbose=verbose, incremental=incremental
+            )
+
+    def _evaluate_scenario(
+        self,
+        property_changes: List[Tuple[str, str, Any]],
+        baseline: Dict[str, Dict[str, Any]],
+        title: str,
+        *,
+        verbose: bool,
+        incremental: bool,
+    ) -> ScenarioRunResult:
+        """Apply one change set in an overlay on top of the given baseline, execute, and build the result."""
+        with self._span(title or "scenario", "scenario", changes=len(property_changes)), \
+                self.executor.scenario_overlay() as delta:
             for node_id, property_name, new_value in property_changes:
                 self.executor.update_node_property(node_id, property_name, new_value)
             if verbose:
                 logger.info("[What-If] 计算过程:")
-            self.executor.execute(verbose=verbose)
-            scenario = self.executor.get_all_data_nodes()
-            diff = _compute_diff(baseline, scenario)
-            overrides = _property_changes_to_overrides(property_changes)
-            affected_node_ids = sorted({d["node_id"] for d in diff})
-            outputs_per_node = _build_outputs_per_node(self.executor.graph, scenario)
-            result = ScenarioRunResult(
-                baseline=baseline,
-                scenario=scenario,
-                diff=diff,
-                overrides=overrides,
-                outputs_per_node=outputs_per_node,
-                affected_node_ids=affected_node_ids,
-                errors=[],  # executor does not yet return errors
-                success=True,
+            if incremental:
+                self.executor.execute_incremental(verbose=verbose)
+            else:
+                self.executor.execute(verbose=verbose)
+            scenario = ScenarioState(
+                baseline,
+                {node_id: dict(props) for node_id, props in delta.items() if node_id in baseline},
             )
-            if title:
-                logger.info("[%s] Diff (baseline -> scenario):", title)
-                for d in diff:
-                    logger.info(
-                        "  %s.%s: %s -> %s",
-                        d['node_id'], d['property_name'],
-                        d['baseline_value'], d['scenario_value']
-                    )
-            return result
-        finally:
-            self.executor.restore_data_nodes(snapshot)
+            with self._span("diff", "diff"):
+                diff = _compute_overlay_diff(baseline, delta)
+        overrides = _property_changes_to_overrides(property_changes)
+        affected_node_ids = sorted({d["node_id"] for d in diff})
+        outputs_per_node = _build_outputs_per_node(self.executor.graph, scenario)
+        result = ScenarioRunResult(
+            baseline=baseline,
+            scenario=scenario,
+            diff=diff,
+            overrides=overrides,
+            outputs_per_node=outputs_per_node,
+            affected_node_ids=affected_node_ids,
+            errors=[],  # executor does not yet return errors
+            success=True,
+        )
+        if title:
+            logger.info("[%s] Diff (baseline -> scenario):", title)
+            for d in diff:
+                logger.info(
+                    "  %s.%s: %s -> %s",
+                    d['node_id'], d['property_name'],
+                    d['baseline_value'], d['scenario_value']
+                )
+        return result
@@ -3,6 +3,8 @@ ComputationGraphExecutor 单元测试。
 
 使用内存中的 node_data_map，不依赖 Neo4j。
 """
+import threading
+
 import pytest
 
 from domain.services.computation_graph_executor import ComputationGraphExecutor
@@ -114,3 +116,268 @@ class TestComputationGraphExecutor:
         ok = exec_one.execute(verbose=False)
         assert ok
         assert exec_one.get_node_data("invoice_001")["subtotal"] == 30.0
+
+    def test_execution_plan_cached(self, sample_graph, sample_node_data_map):
+        """执行计划只编译一次，多次 execute 复用同一计划。"""
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        plan = executor.get_execution_plan()
+        assert plan is not None
+        assert plan.order == ("calc_subtotal", "calc_tax")
+        step = plan.steps[0]
+        assert step.inputs == (("order_001", "price"), ("order_001", "quantity"))
+        assert step.outputs == (("invoice_001", "subtotal"),)
+        executor.execute(verbose=False)
+        executor.update_node_property("order_001", "price", 200.0)
+        executor.execute(verbose=False)
+        assert executor.get_execution_plan() is plan
+        assert executor.get_node_data("invoice_001")["tax"] == 100.0
+
+    def test_binding_index_and_execute_node(self, sample_graph, sample_node_data_map):
+        """绑定索引记录每个计算节点的读/写；_execute_node 基于索引单独执行一个节点。"""
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        index = executor.get_binding_index()
+        assert index["calc_tax"].reads == (("invoice_001", "subtotal"), ("invoice_001", "tax_rate"))
+        assert index["calc_tax"].writes == (("invoice_001", "tax"),)
+        assert executor.get_binding_index() is index
+        assert executor._execute_node("calc_subtotal", verbose=False) == 500.0
+        assert executor.get_node_data("invoice_001")["subtotal"] == 500.0
+        assert executor._execute_node("order_001", verbose=False) is None
+
+    def test_code_compiled_once_and_syntax_error_at_load(self, sample_graph, sample_node_data_map):
+        """节点代码按 (node_id, code hash) 缓存编译结果；语法错误在构造执行器时抛出。"""
+        from domain.services.code_cache import compile_node_code
+
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        step = executor.get_execution_plan().steps[0]
+        assert step.compiled is compile_node_code("calc_subtotal", "price * quantity")
+        assert compile_node_code("calc_subtotal", "price + quantity") is not step.compiled
+
+        broken = sample_graph.get_computation_node("calc_tax")
+        bad_graph = sample_graph.add_computation_node(
+            type(broken)(
+                id=broken.id, name=broken.name, level=broken.level, inputs=broken.inputs,
+                outputs=broken.outputs, code="subtotal *", engine=broken.engine,
+            )
+        )
+        with pytest.raises(ValueError, match="calc_tax"):
+            ComputationGraphExecutor(bad_graph, sample_node_data_map)
+
+    def test_execute_incremental_only_downstream(self, sample_graph, sample_node_data_map):
+        """增量执行只重算脏属性下游的计算节点，结果与全量执行一致。"""
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        plan = executor.get_execution_plan()
+        assert [s.node_id for s in plan.downstream_steps([("invoice_001", "tax_rate")])] == ["calc_tax"]
+        assert [s.node_id for s in plan.downstream_steps([("order_001", "price")])] == [
+            "calc_subtotal", "calc_tax",
+        ]
+        assert plan.downstream_steps([("order_001", "order_id")]) == ()
+
+        executor.update_node_property("invoice_001", "tax_rate", 0.2)
+        assert executor.execute_incremental(verbose=False) is True
+        assert executor.get_node_data("invoice_001")["tax"] == 100.0
+
+        executor.update_node_property("order_001", "price", 200.0)
+        executor.execute_incremental(verbose=False)
+        assert executor.get_node_data("invoice_001")["subtotal"] == 1000.0
+        assert executor.get_node_data("invoice_001")["tax"] == 200.0
+
+    def test_scenario_overlay_keeps_baseline(self, sample_graph, sample_node_data_map):
+        """覆盖层内的写入只进入 delta；基线不变，退出后丢弃 delta。"""
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        with executor.scenario_overlay() as delta:
+            executor.update_node_property("order_001", "price", 200.0)
+            executor.execute(verbose=False)
+            assert executor.get_node_data("invoice_001")["subtotal"] == 1000.0
+            assert executor.get_all_data_nodes()["invoice_001"]["tax"] == 100.0
+            assert executor.G.nodes["invoice_001"]["subtotal"] == 500.0
+            assert delta["order_001"] == {"price": 200.0}
+            assert delta["invoice_001"] == {"subtotal": 1000.0, "tax": 100.0}
+            with pytest.raises(RuntimeError):
+                executor.begin_overlay()
+        assert executor.get_node_data("order_001")["price"] == 100.0
+        assert executor.get_node_data("invoice_001")["subtotal"] == 500.0
+
+    @pytest.mark.parametrize("incremental", [False, True])
+    def test_overlay_does_not_consume_baseline_dirty(
+        self, sample_graph, sample_node_data_map, incremental
+    ):
+        """基线上未执行的修改不会泄漏进覆盖层，退出覆盖层后仍可增量执行。"""
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        executor.update_node_property("order_001", "price", 200.0)
+        with executor.scenario_overlay() as delta:
+            executor.update_node_property("invoice_001", "tax_rate", 0.2)
+            if incremental:
+                executor.execute_incremental(verbose=False)
+                assert executor.last_executed_node_ids == ["calc_tax"]
+            else:
+                executor.execute(verbose=False)
+            assert "order_001" not in delta
+        executor.execute_incremental(verbose=False)
+        assert executor.get_node_data("invoice_001")["subtotal"] == 1000.0
+        assert executor.get_node_data("invoice_001")["tax"] == 100.0
+
+    def test_baseline_snapshot_cached_until_baseline_changes(self, sample_graph, sample_node_data_map):
+        """get_baseline_snapshot 在基线不变时返回同一对象、忽略覆盖层；基线写入后重建，旧快照不变。"""
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        snapshot = executor.get_baseline_snapshot()
+        assert snapshot == executor.get_all_data_nodes()
+        assert executor.get_baseline_snapshot() is snapshot
+        with executor.scenario_overlay():
+            executor.update_node_property("order_001", "price", 1.0)
+            executor.execute(verbose=False)
+            assert executor.get_baseline_snapshot() is snapshot
+        executor.update_node_property("order_001", "price", 200.0)
+        updated = executor.get_baseline_snapshot()
+        assert updated is not snapshot
+        assert updated["order_001"]["price"] == 200.0
+        assert snapshot["order_001"]["price"] == 100.0
+        executor.execute(verbose=False)
+        assert executor.get_baseline_snapshot()["invoice_001"]["subtotal"] == 1000.0
+        executor.restore_data_nodes(executor.snapshot_data_nodes())
+        assert executor.get_baseline_snapshot() is not updated
+
+    @pytest.mark.parametrize("use_processes", [False, True])
+    def test_execute_parallel_matches_sequential(
+        self, sample_graph, sample_node_data_map, input_specs, use_processes
+    ):
+        """按层级并行执行的结果与顺序执行一致；互不依赖的节点位于同一层级。"""
+        from domain.models import (
+            ComputationEngine, ComputationLevel, ComputationNode,
+            ComputationRelationship, ComputationRelationType, OutputSpec,
+        )
+        from domain.services.execution_profiler import ExecutionProfiler
+        from domain.services.tracing import TraceRecorder
+
+        discount_out = OutputSpec("property", "Order", "discount")
+        graph = sample_graph.add_computation_node(ComputationNode(
+            id="calc_discount", name="calculate_discount", level=ComputationLevel.PROPERTY,
+            inputs=(input_specs["price"],), outputs=(discount_out,),
+            code="price * 0.05", engine=ComputationEngine.PYTHON, priority=1,
+        ))
+        graph = graph.add_computation_relationship(ComputationRelationship(
+            "rel_discount_price", "order_001", "calc_discount", "price_depends",
+            ComputationRelationType.DEPENDS_ON, "property", datasource=input_specs["price"],
+        ))
+        graph = graph.add_computation_relationship(ComputationRelationship(
+            "rel_discount_out", "calc_discount", "order_001", "discount_result",
+            ComputationRelationType.OUTPUT_TO, "property", data_output=discount_out,
+        ))
+
+        sequential = ComputationGraphExecutor(graph, sample_node_data_map)
+        sequential.execute(verbose=False)
+        parallel = ComputationGraphExecutor(graph, sample_node_data_map)
+        plan = parallel.get_execution_plan()
+        assert [[plan.steps[i].node_id for i in level] for level in plan.levels] == [
+            ["calc_subtotal", "calc_discount"], ["calc_tax"],
+        ]
+        parallel.profiler = ExecutionProfiler()
+        assert parallel.execute_parallel(max_workers=2, use_processes=use_processes) is True
+        assert parallel.get_all_data_nodes() == sequential.get_all_data_nodes()
+        assert parallel.get_node_data("order_001")["discount"] == 5.0
+        report = parallel.profiler.report()
+        assert sorted(report) == ["calc_discount", "calc_subtotal", "calc_tax"]
+        assert all(p.calls == 1 and p.errors == 0 for p in report.values())
+
+        tracer = TraceRecorder()
+        tracer.attach(parallel)
+        parallel.execute_parallel(max_workers=2, use_processes=use_processes)
+        tids = {e["name"]: e["tid"] for e in tracer.events}
+        caller = threading.get_ident()
+        assert tids["calc_tax"] == caller  # single-node level runs on the calling thread
+        assert (tids["calc_subtotal"] == caller) is use_processes
+        assert (tids["calc_discount"] == caller) is use_processes
+
+    def test_evaluate_runs_only_required_ancestors(self, sample_graph, sample_node_data_map):
+        """evaluate 只执行目标属性所需的祖先节点并返回其值。"""
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        plan = executor.get_execution_plan()
+        assert [s.node_id for s in plan.upstream_steps([("invoice_001", "subtotal")])] == ["calc_subtotal"]
+        assert [s.node_id for s in plan.upstream_steps([("invoice_001", "tax")])] == [
+            "calc_subtotal", "calc_tax",
+        ]
+
+        values = executor.evaluate([("invoice_001", "subtotal")])
+        assert values == {("invoice_001", "subtotal"): 500.0}
+        assert "tax" not in executor.get_node_data("invoice_001")
+
+        values = executor.evaluate([("invoice_001", "tax"), ("order_001", "price"), ("missing", "x")])
+        assert values == {
+            ("invoice_001", "tax"): 50.0,
+            ("order_001", "price"): 100.0,
+            ("missing", "x"): None,
+        }
+
+    def test_memoization_skips_eval_on_identical_inputs(self, sample_graph, sample_node_data_map):
+        """启用记忆化后，输入未变的节点命中缓存；properties["memoize"] = False 的节点不参与。"""
+        from domain.services.result_memo import NodeResultMemo
+
+        memo = NodeResultMemo(max_entries_per_node=8)
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map, memo=memo)
+        executor.execute(verbose=False)
+        for rate in (0.2, 0.3, 0.1):
+            with executor.scenario_overlay():
+                executor.update_node_property("invoice_001", "tax_rate", rate)
+                executor.execute(verbose=False)
+                assert executor.get_node_data("invoice_001")["tax"] == pytest.approx(500.0 * rate)
+        stats = memo.stats()
+        assert stats["calc_subtotal"].hits == 3
+        assert stats["calc_subtotal"].misses == 1
+        assert stats["calc_tax"].hits == 1  # tax_rate 回到 0.1
+        assert stats["calc_tax"].misses == 3
+        assert memo.hits == 4 and memo.misses == 4
+
+        impure = sample_graph.add_computation_node(
+            sample_graph.get_computation_node("calc_subtotal").with_properties(memoize=False)
+        )
+        memo.clear()
+        executor = ComputationGraphExecutor(impure, sample_node_data_map, memo=memo)
+        executor.execute(verbose=False)
+        executor.execute(verbose=False)
+        assert "calc_subtotal" not in memo.stats()
+        assert memo.stats()["calc_tax"].hits == 1
+
+    def test_incremental_equality_cutoff(self, sample_graph, sample_node_data_map):
+        """重算结果未变时截断传播：下游输入全部未变的节点被跳过；数值容差内的变化视为未变。"""
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        executor.update_node_property("order_001", "price", 50.0)
+        executor.update_node_property("order_001", "quantity", 10)
+        executor.execute_incremental(verbose=False)
+        assert executor.last_executed_node_ids == ["calc_subtotal"]  # subtotal 仍为 500，calc_tax 被跳过
+        assert executor.get_node_data("invoice_001")["tax"] == 50.0
+
+        executor.update_node_property("order_001", "price", 50.0000001)
+        executor.execute_incremental(verbose=False)
+        assert executor.last_executed_node_ids == ["calc_subtotal", "calc_tax"]
+
+        tolerant = ComputationGraphExecutor(sample_graph, sample_node_data_map, change_tolerance=1e-3)
+        tolerant.execute(verbose=False)
+        tolerant.update_node_property("order_001", "price", 100.0000001)
+        tolerant.execute_incremental(verbose=False)
+        assert tolerant.last_executed_node_ids == ["calc_subtotal"]
+        assert tolerant.get_node_data("invoice_001")["tax"] == 50.0
+
+    def test_profiler_records_per_node_timings(self, sample_graph, sample_node_data_map):
+        """设置 profiler 后记录每个节点的调用、异常与各阶段耗时，并回调 on_node。"""
+        from domain.services.execution_profiler import ExecutionProfiler
+
+        events = []
+        profiler = ExecutionProfiler(on_node=events.append)
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map, profiler=profiler)
+        executor.execute(verbose=False)
+        executor.update_node_property("order_001", "price", None)  # price * quantity 出错
+        executor.execute(verbose=False)
+
+        report = profiler.report()
+        assert set(report) == {"calc_subtotal", "calc_tax"}
+        assert report["calc_subtotal"].calls == 2
+        assert report["calc_subtotal"].errors == 1
+        assert report["calc_tax"].errors == 0
+        assert report["calc_tax"].total_seconds >= report["calc_tax"].eval_seconds >= 0
+        assert [e.node_id for e in events] == ["calc_subtotal", "calc_tax"] * 2
+        assert events[2].ok is False
+        assert profiler.slowest(1)[0].node_id in report
@@ -0,0 +1,112 @@
+"""
+IncrementalDataRefresher 单元测试（mock provider + 真实 ComputationGraphExecutor，不连接 Neo4j）。
+"""
+import pytest
+
+from domain.services.computation_executor import Neo4jDataProvider
+from domain.services.computation_graph_executor import ComputationGraphExecutor
+from domain.services.data_refresher import IncrementalDataRefresher
+from domain.services.neo4j_graph_manager import Neo4jGraphManager
+
+
+@pytest.fixture
+def manager():
+    """mock provider 中的业务节点与 sample_node_data_map 一致，带 updated_at 版本戳。"""
+    provider = Neo4jDataProvider(mock_data={
+        "o": {"type": "Order", "uuid": "order_001", "price": 100.0, "quantity": 5, "updated_at": 10},
+        "i": {"type": "Invoice", "uuid": "invoice_001", "tax_rate": 0.1, "updated_at": 10},
+    })
+    m = Neo4jGraphManager("bolt://unused", "u", "p")
+    m.data_provider = provider
+    return m
+
+
+class TestIncrementalDataRefresher:
+    """按水位线轮询变更、修补基线并增量重算。"""
+
+    @pytest.mark.asyncio
+    async def test_refresh_patches_changed_inputs_and_recomputes_cone(
+        self, manager, sample_graph, sample_node_data_map
+    ):
+        """只修补自水位线以来变化的输入属性，并只重算其下游影响锥。"""
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        refresher = IncrementalDataRefresher(executor, manager, watermark=10)
+
+        unchanged = await refresher.refresh()
+        assert unchanged.patched_properties == () and unchanged.recomputed_node_ids == ()
+
+        mock = manager.data_provider.mock_data
+        mock["i"].update(tax_rate=0.2, updated_at=11)
+        result = await refresher.refresh()
+        assert result.changed_node_ids == ("invoice_001",)
+        assert result.patched_properties == (("invoice_001", "tax_rate"),)
+        assert result.recomputed_node_ids == ("calc_tax",)
+        assert result.watermark == refresher.watermark == 11
+        assert executor.get_property_value("invoice_001", "tax") == pytest.approx(100.0)
+
+        mock["o"]["price"] = 999.0  # stamp (10) below the watermark: not picked up
+        assert (await refresher.refresh()).patched_properties == ()
+        assert executor.get_property_value("order_001", "price") == 100.0
+
+        mock["o"].update(price=200.0, updated_at=12)
+        result = await refresher.refresh()
+        assert result.recomputed_node_ids == ("calc_subtotal", "calc_tax")
+        assert executor.get_property_value("invoice_001", "subtotal") == 1000.0
+
+    @pytest.mark.asyncio
+    async def test_refresh_ignores_stale_computed_outputs(
+        self, manager, sample_graph, sample_node_data_map
+    ):
+        """业务节点上的计算输出副本（如旧的 subtotal）不会覆盖重算结果，也不在投影中。"""
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        refresher = IncrementalDataRefresher(executor, manager, watermark=10)
+        assert refresher._reads_by_node["invoice_001"] == ["tax_rate"]
+
+        manager.data_provider.mock_data["i"].update(subtotal=1.0, updated_at=11)
+        result = await refresher.refresh()
+        assert result.changed_node_ids == ()
+        assert result.patched_properties == ()
+        assert result.recomputed_node_ids == ()
+        assert result.watermark == 11
+        assert executor.get_property_value("invoice_001", "subtotal") == 500.0
+
+    @pytest.mark.asyncio
+    async def test_refresh_merges_properties_of_data_nodes_sharing_a_uuid(
+        self, sample_graph, sample_node_data_map
+    ):
+        """两个数据节点映射到同一 Neo4j uuid 时，两者读取的属性都被拉取并修补。"""
+        provider = Neo4jDataProvider(mock_data={
+            "s": {
+                "type": "Sale", "uuid": "sale_1", "price": 100.0, "quantity": 5,
+                "tax_rate": 0.1, "updated_at": 10,
+            },
+        })
+        manager = Neo4jGraphManager("bolt://unused", "u", "p")
+        manager.data_provider = provider
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        refresher = IncrementalDataRefresher(
+            executor, manager, watermark=10,
+            data_node_id_to_neo4j_uuid={"order_001": "sale_1", "invoice_001": "sale_1"},
+        )
+
+        provider.mock_data["s"].update(price=200.0, tax_rate=0.2, updated_at=11)
+        result = await refresher.refresh()
+        assert set(result.patched_properties) == {("order_001", "price"), ("invoice_001", "tax_rate")}
+        assert result.changed_node_ids == ("order_001", "invoice_001")
+        assert executor.get_property_value("invoice_001", "subtotal") == 1000.0
+        assert executor.get_property_value("invoice_001", "tax") == pytest.approx(200.0)
+
+    @pytest.mark.asyncio
+    async def test_refresh_rejected_while_overlay_active(
+        self, manager, sample_graph, sample_node_data_map
+    ):
+        """场景覆盖层激活时刷新会抛 RuntimeError，避免把基线数据写进场景。"""
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        refresher = IncrementalDataRefresher(executor, manager)
+        with executor.scenario_overlay():
+            with pytest.raises(RuntimeError):
+                await refresher.refresh()
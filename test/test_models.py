@@ -12,6 +12,7 @@ from domain.models import (
     ComputationNode,
     ComputationRelationship,
     ComputationGraph,
+    derive_writer_reader_edges,
 )
 
 
@@ -150,6 +151,18 @@ class TestComputationGraph:
         assert "tax" in out["invoice_001"]
         assert "order_001" not in out
 
+    def test_get_required_properties_by_data_node(self, sample_graph):
+        required = sample_graph.get_required_properties_by_data_node()
+        assert required["order_001"] == ["price", "quantity"]
+        assert sorted(required["invoice_001"]) == ["subtotal", "tax", "tax_rate"]
+
+    def test_get_implicit_dependencies(self, sample_graph):
+        # calc_subtotal 写 invoice_001.subtotal，calc_tax 读 invoice_001.subtotal
+        assert sample_graph.get_implicit_dependencies() == [("calc_subtotal", "calc_tax")]
+        assert derive_writer_reader_edges(sample_graph.computation_relationships.values()) == [
+            ("calc_subtotal", "calc_tax")
+        ]
+
     def test_add_computation_node_immutable(self, sample_graph, sample_computation_nodes):
         new_node = ComputationNode(
             id="calc_extra",
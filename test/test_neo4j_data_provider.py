@@ -1,11 +1,103 @@
 """
 Neo4jDataProvider 使用 mock_data 的单元测试（不连接真实 Neo4j）。
 """
+import asyncio
+
 import pytest
 
 from domain.services.computation_executor import Neo4jDataProvider
 
 
+class _FakeResult:
+    """记录型假结果：single/consume/异步迭代返回预设记录。"""
+
+    def __init__(self, records):
+        self._records = list(records)
+
+    async def single(self):
+        return self._records[0] if self._records else None
+
+    async def consume(self):
+        return None
+
+    def __aiter__(self):
+        return self._iter()
+
+    async def _iter(self):
+        for record in self._records:
+            yield record
+
+
+class _FakeSession:
+    """记录每次 run 的 (query, params, in_transaction)；respond(query, params) 决定返回的记录。"""
+
+    def __init__(self, driver):
+        self._driver = driver
+
+    async def __aenter__(self):
+        self._driver.sessions += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        self._driver.closed_in_flight.append(self._driver.in_flight)
+        return False
+
+    async def run(self, query, parameters=None, **params):
+        driver = self._driver
+        if driver.fail is not None and driver.fail({**(parameters or {}), **params}):
+            raise RuntimeError("query failed")
+        driver.in_flight += 1
+        driver.max_in_flight = max(driver.max_in_flight, driver.in_flight)
+        try:
+            await asyncio.sleep(driver.delay)
+        finally:
+            driver.in_flight -= 1
+        return self._record(query, {**(parameters or {}), **params}, False)
+
+    async def execute_write(self, fn, *args, **kwargs):
+        self._driver.transactions += 1
+        return await fn(self._Tx(self), *args, **kwargs)
+
+    def _record(self, query, params, in_tx):
+        self._driver.runs.append((query, params, in_tx))
+        return _FakeResult(self._driver.respond(query, params))
+
+    class _Tx:
+        def __init__(self, session):
+            self._session = session
+
+        async def run(self, query, parameters=None, **params):
+            return self._session._record(query, {**(parameters or {}), **params}, True)
+
+
+class _FakeDriver:
+    """不连接数据库的假驱动，用于检查生成的 Cypher、参数与批次划分；fail(params) 为真时 run 立即抛错。"""
+
+    def __init__(self, respond=None, delay=0.0, fail=None):
+        self.respond = respond or (lambda query, params: [])
+        self.delay = delay
+        self.fail = fail
+        self.closed_in_flight = []  # in_flight count at each session close
+        self.runs = []
+        self.sessions = 0
+        self.transactions = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def session(self, **kwargs):
+        return _FakeSession(self)
+
+    async def close(self):
+        return None
+
+
+def _provider_with_driver(driver):
+    """使用假驱动（非 mock 模式）的 provider。"""
+    provider = Neo4jDataProvider(uri="bolt://fake", user="u", password="p")
+    provider._driver = driver
+    return provider
+
+
 @pytest.fixture
 def mock_provider():
     """使用 mock_data 的 provider，不连接 Neo4j。"""
@@ -67,3 +159,335 @@ class TestNeo4jDataProviderMock:
         await mock_provider.close()
         # mock 下 close 不应抛错
         assert True
+
+    @pytest.mark.asyncio
+    async def test_get_data_nodes_by_uuids(self, mock_provider):
+        """批量按 uuid 读取：返回 uuid -> props，缺失的 uuid 不出现，重复 uuid 只查一次。"""
+        found = await mock_provider.get_data_nodes_by_uuids(
+            ["order_001", "invoice_001", "order_001", "missing"], batch_size=1
+        )
+        assert set(found) == {"order_001", "invoice_001"}
+        assert found["order_001"]["price"] == 100.0
+        assert "type" not in found["invoice_001"]
+        with pytest.raises(ValueError):
+            await mock_provider.get_data_nodes_by_uuids(["order_001"], batch_size=0)
+
+    @pytest.mark.asyncio
+    async def test_manager_load_by_mapping_uses_bulk_loader(self, mock_provider):
+        """load_data_nodes_from_neo4j_by_mapping 通过批量读取得到以数据节点 ID 为 key 的 node_data_map。"""
+        from domain.services.neo4j_graph_manager import Neo4jGraphManager
+
+        manager = Neo4jGraphManager("bolt://unused", "u", "p")
+        manager.data_provider = mock_provider
+        node_data_map = await manager.load_data_nodes_from_neo4j_by_mapping(
+            {"dn_order": "order_001", "dn_invoice": "invoice_001", "dn_missing": "nope"}
+        )
+        assert set(node_data_map) == {"dn_order", "dn_invoice"}
+        assert node_data_map["dn_invoice"]["tax_rate"] == 0.1
+
+    @pytest.mark.asyncio
+    async def test_merge_data_nodes_mock(self, mock_provider):
+        """mock 模式批量 MERGE DataNode，返回写入统计。"""
+        stats = await mock_provider.merge_data_nodes(
+            {"order_001": {"price": 1.0}, "invoice_001": {"tax_rate": 0.2}}, batch_size=1
+        )
+        assert (stats.requested, stats.written, stats.batches) == (2, 2, 2)
+        assert mock_provider.mock_data["datanode_order_001"]["price"] == 1.0
+        assert mock_provider.mock_data["datanode_invoice_001"]["uuid"] == "invoice_001"
+
+
+class TestNeo4jDataProviderBulk:
+    """批量读写在真实驱动路径上的查询与批次划分（假驱动）。"""
+
+    @pytest.mark.asyncio
+    async def test_merge_data_nodes_chunks_into_write_transactions(self):
+        """每批一个显式写事务、一条 UNWIND 查询，且只打开一个 session。"""
+        driver = _FakeDriver(lambda query, params: [{"written": len(params["rows"])}])
+        provider = _provider_with_driver(driver)
+        nodes = {f"n{i}": {"v": i} for i in range(5)}
+        stats = await provider.merge_data_nodes(nodes, batch_size=2)
+        assert (stats.requested, stats.written, stats.batches) == (5, 5, 3)
+        assert driver.sessions == 1 and driver.transactions == 3
+        assert all(in_tx and "UNWIND $rows" in query for query, _, in_tx in driver.runs)
+        assert [len(params["rows"]) for _, params, _ in driver.runs] == [2, 2, 1]
+        assert driver.runs[0][1]["rows"][0] == {"uuid": "n0", "props": {"v": 0, "uuid": "n0"}}
+
+    @pytest.mark.asyncio
+    async def test_sync_graph_writes_in_few_transactions(self, sample_graph, sample_node_data_map):
+        """sync_graph_to_neo4j 以 UNWIND 批量写入数据节点、计算节点与各类型关系，每批一个事务。"""
+        from domain.services.neo4j_graph_manager import Neo4jGraphManager
+
+        def respond(query, params):
+            rows = params["rows"]
+            if "CREATE (n:ComputationNode)" in query:
+                return [{"i": i, "node_id": f"4:{row['id']}"} for i, row in enumerate(rows)]
+            if "CREATE (source)" in query:
+                return [{"created": len(rows)}]
+            return [{"written": len(rows)}]
+
+        driver = _FakeDriver(respond)
+        manager = Neo4jGraphManager("bolt://fake", "u", "p")
+        manager.data_provider = _provider_with_driver(driver)
+        await manager.sync_graph_to_neo4j(sample_graph, sample_node_data_map)
+
+        assert manager.comp_node_id_map == {
+            node_id: f"4:{node_id}" for node_id in sample_graph.computation_nodes
+        }
+        # DataNodes + ComputationNodes + DEPENDS_ON + OUTPUT_TO: one transaction each
+        assert driver.transactions == 4
+        assert all(in_tx and query.startswith("UNWIND") for query, _, in_tx in driver.runs)
+        rel_rows = [params["rows"] for query, params, _ in driver.runs if "CREATE (source)" in query]
+        assert sum(len(rows) for rows in rel_rows) == len(sample_graph.computation_relationships)
+        assert all(row["props"]["graph_id"] == sample_graph.id for rows in rel_rows for row in rows)
+
+    @pytest.mark.asyncio
+    async def test_create_node_and_relationship_use_props_parameter(self):
+        """属性通过 $props 参数传递：不同属性值生成相同的 Cypher 文本，字符串不做内联转义。"""
+        driver = _FakeDriver(lambda query, params: [{"node_id": "4:1", "rel_id": "5:1"}])
+        provider = _provider_with_driver(driver)
+        await provider.create_node("Order", {"uuid": "o1", "note": "it's"})
+        await provider.create_node("Order", {"uuid": "o2", "price": 2.5})
+        await provider.create_relationship("4:1", "4:2", "REQUIRES", {"name": "a'b"})
+        (q1, p1, _), (q2, p2, _), (q3, p3, _) = driver.runs
+        assert q1 == q2 and "$props" in q1 and "it's" not in q1
+        assert p1["props"] == {"uuid": "o1", "note": "it's"}
+        assert "$props" in q3 and p3["props"] == {"name": "a'b"}
+
+    @pytest.mark.asyncio
+    async def test_invalid_label_or_relationship_type_rejected(self, mock_provider):
+        """标签 / 关系类型不是合法标识符时抛 ValueError（mock 模式同样校验）。"""
+        with pytest.raises(ValueError):
+            await mock_provider.create_node("Order) DETACH DELETE (m", {"uuid": "x"})
+        with pytest.raises(ValueError):
+            await mock_provider.create_relationship("a", "b", "REL`]->()", {})
+        with pytest.raises(ValueError):
+            await mock_provider.create_nodes("1Order", [{}])
+
+    @pytest.mark.asyncio
+    async def test_write_back_state_writes_only_changes_in_one_transaction(self):
+        """write_back_state 只写与基线不同的属性，按 DataNode 分组、分批但只用一个事务。"""
+        from domain.services.neo4j_graph_manager import Neo4jGraphManager
+
+        driver = _FakeDriver(lambda query, params: [{"written": len(params["rows"])}])
+        manager = Neo4jGraphManager("bolt://fake", "u", "p")
+        manager.data_provider = _provider_with_driver(driver)
+        baseline = {
+            "a": {"subtotal": 1.0, "tax": 0.1},
+            "b": {"subtotal": 2.0, "tax": 0.2},
+            "c": {"subtotal": 3.0, "tax": 0.3},
+        }
+        state = {
+            "a": {"subtotal": 5.0, "tax": 0.1},
+            "b": {"subtotal": 2.0, "tax": 0.2},
+            "c": {"subtotal": 6.0, "tax": 0.6, "note": "x"},
+        }
+        stats = await manager.write_back_state(state, baseline, ["subtotal", "tax"], batch_size=1)
+        assert (stats.requested, stats.written, stats.batches) == (2, 2, 2)
+        assert driver.transactions == 1
+        rows = [row for _, params, _ in driver.runs for row in params["rows"]]
+        assert rows == [
+            {"uuid": "a", "props": {"subtotal": 5.0}},
+            {"uuid": "c", "props": {"subtotal": 6.0, "tax": 0.6}},
+        ]
+
+    @pytest.mark.asyncio
+    async def test_load_data_nodes_read_and_write_batch_sizes(self):
+        """load_data_nodes_from_neo4j 分别按 read_batch_size 分块读取、按 write_batch_size 分批物化。"""
+        from domain.services.neo4j_graph_manager import Neo4jGraphManager
+
+        def respond(query, params):
+            if "MERGE" in query:
+                return [{"written": len(params["rows"])}]
+            return [{"uuid": row["uuid"], "props": {"v": 1}, "pairs": []} for row in params["rows"]]
+
+        driver = _FakeDriver(respond)
+        manager = Neo4jGraphManager("bolt://fake", "u", "p")
+        manager.data_provider = _provider_with_driver(driver)
+        uuids = [f"u{i}" for i in range(6)]
+        node_data_map = await manager.load_data_nodes_from_neo4j(uuids, read_batch_size=3, write_batch_size=2)
+        assert list(node_data_map) == uuids
+        reads = [params for query, params, in_tx in driver.runs if not in_tx]
+        writes = [params for query, params, in_tx in driver.runs if in_tx]
+        assert [len(p["rows"]) for p in reads] == [3, 3]
+        assert [len(p["rows"]) for p in writes] == [2, 2, 2]
+
+    @pytest.mark.asyncio
+    async def test_projected_load_does_not_replace_data_node_properties(self):
+        """带投影加载时物化用 SET n += ...，保留 DataNode 上未拉取的属性；全量加载仍整体替换。"""
+        from domain.services.neo4j_graph_manager import Neo4jGraphManager
+
+        def respond(query, params):
+            if "MERGE" in query:
+                return [{"written": len(params["rows"])}]
+            return [{"uuid": row["uuid"], "props": None, "pairs": [["v", 1]]} for row in params["rows"]]
+
+        driver = _FakeDriver(respond)
+        manager = Neo4jGraphManager("bolt://fake", "u", "p")
+        manager.data_provider = _provider_with_driver(driver)
+        await manager.load_data_nodes_from_neo4j(["u1"], properties={"u1": ["v"]})
+        merges = [query for query, _, in_tx in driver.runs if in_tx]
+        assert len(merges) == 1 and "SET n += row.props" in merges[0]
+
+        driver.runs.clear()
+        driver.respond = lambda query, params: (
+            [{"written": len(params["rows"])}] if "MERGE" in query
+            else [{"uuid": row["uuid"], "props": {"v": 1}, "pairs": []} for row in params["rows"]]
+        )
+        await manager.load_data_nodes_from_neo4j(["u1"])
+        merges = [query for query, _, in_tx in driver.runs if in_tx]
+        assert len(merges) == 1 and "SET n = row.props" in merges[0]
+
+    @pytest.mark.asyncio
+    async def test_sync_graph_materializes_all_properties(self, sample_graph):
+        """sync_graph_to_neo4j（可视化路径）不做投影：DataNode 与返回的 node_data_map 含全部业务属性。"""
+        from domain.services.neo4j_graph_manager import Neo4jGraphManager
+
+        provider = Neo4jDataProvider(mock_data={
+            "o": {"type": "Order", "uuid": "order_001", "price": 1.0, "quantity": 2, "notes": "wide"},
+            "i": {"type": "Invoice", "uuid": "invoice_001", "tax_rate": 0.1, "customer": "acme"},
+        })
+        manager = Neo4jGraphManager("bolt://unused", "u", "p")
+        manager.data_provider = provider
+        node_data_map = await manager.sync_graph_to_neo4j(sample_graph)
+        assert node_data_map["order_001"]["notes"] == "wide"
+        assert provider.mock_data["datanode_invoice_001"]["customer"] == "acme"
+
+    @pytest.mark.asyncio
+    async def test_write_back_state_from_executor_state(self, sample_graph, sample_node_data_map):
+        """执行器状态（含内部 priority 键）与加载的 node_data_map 对比：只写回计算输出，不写 priority。"""
+        from domain.services.computation_graph_executor import ComputationGraphExecutor
+        from domain.services.neo4j_graph_manager import Neo4jGraphManager
+
+        driver = _FakeDriver(lambda query, params: [{"written": len(params["rows"])}])
+        manager = Neo4jGraphManager("bolt://fake", "u", "p")
+        manager.data_provider = _provider_with_driver(driver)
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        for state in (executor.get_all_data_nodes(), executor.export_node_data_map()):
+            driver.runs.clear()
+            stats = await manager.write_back_state(state, sample_node_data_map)
+            assert (stats.requested, stats.written) == (1, 1)
+            rows = [row for _, params, _ in driver.runs for row in params["rows"]]
+            assert rows == [{"uuid": "invoice_001", "props": {"subtotal": 500.0, "tax": 50.0}}]
+
+    @pytest.mark.asyncio
+    async def test_load_graph_data_projects_required_properties(self, sample_graph):
+        """默认只拉取图读写的属性；all_properties=True 时拉取全部。"""
+        from domain.services.neo4j_graph_manager import Neo4jGraphManager
+
+        provider = Neo4jDataProvider(mock_data={
+            "o": {"type": "Order", "uuid": "order_001", "price": 1.0, "quantity": 2, "notes": "wide"},
+            "i": {"type": "Invoice", "uuid": "invoice_001", "tax_rate": 0.1, "customer": "acme"},
+        })
+        manager = Neo4jGraphManager("bolt://unused", "u", "p")
+        manager.data_provider = provider
+        projected = await manager.load_graph_data_from_neo4j(sample_graph)
+        assert projected["order_001"] == {"price": 1.0, "quantity": 2}
+        assert projected["invoice_001"] == {"tax_rate": 0.1}
+        full = await manager.load_graph_data_from_neo4j(sample_graph, all_properties=True)
+        assert full["order_001"]["notes"] == "wide"
+        assert full["invoice_001"]["customer"] == "acme"
+
+    @pytest.mark.asyncio
+    async def test_projected_bulk_query_sends_keys(self):
+        """投影时每行带 keys，查询文本不变；投影命中的节点即使没有这些属性也算找到。"""
+        def respond(query, params):
+            return [
+                {"uuid": row["uuid"], "props": None, "pairs": [["price", 1.0]] if "price" in row["keys"] else []}
+                for row in params["rows"]
+            ]
+
+        driver = _FakeDriver(respond)
+        provider = _provider_with_driver(driver)
+        found = await provider.get_data_nodes_by_uuids(
+            ["a", "b"], properties={"a": ["price"], "b": ["missing"]}
+        )
+        assert found == {"a": {"price": 1.0}, "b": {}}
+        (query, params, _), = driver.runs
+        assert params["rows"] == [{"uuid": "a", "keys": ["price"]}, {"uuid": "b", "keys": ["missing"]}]
+
+    @pytest.mark.asyncio
+    async def test_ensure_schema_runs_idempotent_statements(self):
+        """ensure_schema 只执行 IF NOT EXISTS 语句，覆盖 DataNode 约束、graph_id 与各标签/关系类型的 uuid 索引。"""
+        from domain.services.neo4j_graph_manager import Neo4jGraphManager
+
+        driver = _FakeDriver()
+        manager = Neo4jGraphManager(
+            "bolt://fake", "u", "p", business_labels=["Order"], relationship_types=["CERTIFIES"]
+        )
+        manager.data_provider = _provider_with_driver(driver)
+        statements = await manager.ensure_schema()
+        assert [query for query, _, _ in driver.runs] == statements
+        assert all("IF NOT EXISTS" in s for s in statements)
+        assert any("(n:DataNode) REQUIRE n.uuid IS UNIQUE" in s for s in statements)
+        assert any("(n:ComputationNode) ON (n.graph_id)" in s for s in statements)
+        assert any("(n:Order) ON (n.uuid)" in s for s in statements)
+        assert any("()-[r:CERTIFIES]-() ON (r.uuid)" in s for s in statements)
+        with pytest.raises(ValueError):
+            Neo4jGraphManager("bolt://fake", "u", "p", business_labels=["Order`)"])
+
+    @pytest.mark.asyncio
+    async def test_label_qualified_bulk_lookup(self):
+        """配置标签后按标签逐个匹配 uuid，只为尚未找到的 uuid 继续查询下一个标签 / 关系类型。"""
+        def respond(query, params):
+            if ":Order {uuid" in query:
+                return [{"uuid": "o1", "props": {"price": 1.0}, "pairs": []}]
+            if ":Invoice {uuid" in query:
+                return [{"uuid": row["uuid"], "props": {"tax_rate": 0.1}, "pairs": []} for row in params["rows"]]
+            return []
+
+        driver = _FakeDriver(respond)
+        provider = _provider_with_driver(driver)
+        found = await provider.get_data_nodes_by_uuids(
+            ["o1", "i1"], labels=["Order", "Invoice"], relationship_types=["CERTIFIES"]
+        )
+        assert found == {"o1": {"price": 1.0}, "i1": {"tax_rate": 0.1}}
+        queries = [query for query, _, _ in driver.runs]
+        assert len(queries) == 2 and all("WHERE n.uuid" not in q for q in queries)
+        assert [row["uuid"] for row in driver.runs[1][1]["rows"]] == ["i1"]
+
+    @pytest.mark.asyncio
+    async def test_bulk_lookup_bounded_concurrency_reuses_sessions(self):
+        """分块并发查询不超过 concurrency，session 在分块之间复用，结果与顺序读取一致。"""
+        def respond(query, params):
+            return [{"uuid": row["uuid"], "props": {"v": row["uuid"]}, "pairs": []} for row in params["rows"]]
+
+        uuids = [f"u{i}" for i in range(10)]
+        driver = _FakeDriver(respond, delay=0.01)
+        provider = _provider_with_driver(driver)
+        found = await provider.get_data_nodes_by_uuids(uuids, batch_size=2, concurrency=3)
+        assert list(found) == uuids
+        assert len(driver.runs) == 5
+        assert driver.max_in_flight == 3
+        assert driver.sessions == 3
+
+        sequential = _FakeDriver(respond)
+        provider = _provider_with_driver(sequential)
+        assert await provider.get_data_nodes_by_uuids(uuids, batch_size=2, concurrency=1) == found
+        assert sequential.sessions == 1 and sequential.max_in_flight == 1
+
+    @pytest.mark.asyncio
+    async def test_bulk_lookup_failure_stops_other_chunks_before_closing_sessions(self):
+        """某个分块失败时，其余分块先被取消并结束，共享 session 才关闭；异常照常抛出。"""
+        def respond(query, params):
+            return [{"uuid": row["uuid"], "props": {"v": 1}, "pairs": []} for row in params["rows"]]
+
+        driver = _FakeDriver(
+            respond, delay=0.05, fail=lambda params: params["rows"][0]["uuid"] == "u4",
+        )
+        provider = _provider_with_driver(driver)
+        with pytest.raises(RuntimeError):
+            await provider.get_data_nodes_by_uuids([f"u{i}" for i in range(6)], batch_size=2, concurrency=3)
+        assert driver.sessions == 3
+        assert driver.closed_in_flight == [0, 0, 0]
+        assert driver.in_flight == 0
+
+    @pytest.mark.asyncio
+    async def test_modified_since_filters_by_stamp(self):
+        """modified_since 时查询带版本戳条件，水位线与属性名以参数传递。"""
+        driver = _FakeDriver()
+        provider = _provider_with_driver(driver)
+        await provider.get_data_nodes_by_uuids(["a"], modified_since=5, labels=["Order"])
+        (query, params, _), _ = driver.runs
+        assert "WHERE n[$stamp] >= $since" in query
+        assert params["since"] == 5 and params["stamp"] == "updated_at"
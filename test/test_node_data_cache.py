@@ -0,0 +1,57 @@
+"""
+NodeDataCache 与 Neo4jGraphManager.load_graph_data_cached 单元测试（mock provider，不连接 Neo4j）。
+"""
+import pytest
+
+from domain.services.computation_executor import Neo4jDataProvider
+from domain.services.neo4j_graph_manager import Neo4jGraphManager
+from domain.services.node_data_cache import NodeDataCache
+
+
+@pytest.fixture
+def manager():
+    """使用 mock provider 的 manager；业务节点带 updated_at 版本戳。"""
+    provider = Neo4jDataProvider(mock_data={
+        "o": {"type": "Order", "uuid": "order_001", "price": 100.0, "quantity": 5, "updated_at": 1},
+        "i": {"type": "Invoice", "uuid": "invoice_001", "tax_rate": 0.1, "updated_at": 1},
+    })
+    m = Neo4jGraphManager("bolt://unused", "u", "p")
+    m.data_provider = provider
+    return m
+
+
+class TestNodeDataCache:
+    """磁盘缓存与按版本戳增量刷新测试。"""
+
+    @pytest.mark.asyncio
+    async def test_warm_load_refetches_only_stale_nodes(self, manager, sample_graph, tmp_path):
+        """二次加载时版本戳未变的节点取自磁盘，版本戳变化的节点重新拉取。"""
+        cache = NodeDataCache(str(tmp_path))
+        cold = await manager.load_graph_data_cached(sample_graph, cache)
+        assert cold == await manager.load_graph_data_from_neo4j(sample_graph)
+        assert (cache.hits, cache.misses) == (0, 2)
+
+        mock = manager.data_provider.mock_data
+        mock["o"].update(price=120.0, updated_at=2)  # stale: refetched
+        mock["i"]["tax_rate"] = 0.2  # stamp unchanged: served from disk
+        warm = await manager.load_graph_data_cached(sample_graph, cache)
+        assert (cache.hits, cache.misses) == (1, 3)
+        assert warm["order_001"]["price"] == 120.0
+        assert warm["invoice_001"]["tax_rate"] == 0.1
+
+        third = await manager.load_graph_data_cached(sample_graph, cache)
+        assert third == warm
+        assert (cache.hits, cache.misses) == (3, 3)
+
+    def test_unreadable_or_foreign_cache_file_is_ignored(self, tmp_path):
+        """损坏的缓存文件与键不符的缓存都视为空缓存。"""
+        cache = NodeDataCache(str(tmp_path))
+        key = cache.make_key("g", {"a": "a"}, None)
+        assert cache.make_key("g", {"a": "a"}, {"a": ["x"]}) != key
+        path = cache.save("g", key, {"a": (1, {"x": 1})})
+        assert cache.load("g", key) == {"a": (1, {"x": 1})}
+        with open(path, "wb") as f:
+            f.write(b"not a pickle")
+        assert cache.load("g", key) == {}
+        cache.clear()
+        assert list(tmp_path.iterdir()) == []
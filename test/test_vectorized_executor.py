@@ -0,0 +1,132 @@
+"""
+VectorizedGraphExecutor 单元测试。
+
+与 ComputationGraphExecutor 逐行执行的结果对比；需要 numpy。
+"""
+import dataclasses
+
+import pytest
+
+pytest.importorskip("numpy")
+
+from domain.models import (
+    ComputationEngine,
+    ComputationLevel,
+    ComputationNode,
+    ComputationRelationship,
+    ComputationRelationType,
+    OutputSpec,
+)
+from domain.services.computation_graph_executor import ComputationGraphExecutor
+from domain.services.vectorized_executor import VectorizedGraphExecutor
+
+
+def _rows(n):
+    return [
+        {
+            "order_001": {"order_id": f"ORD-{i}", "price": 100.0 + i, "quantity": i % 7},
+            "invoice_001": {"invoice_id": f"INV-{i}", "tax_rate": 0.1},
+        }
+        for i in range(n)
+    ]
+
+
+def _scalar_results(graph, rows):
+    results = []
+    for row in rows:
+        executor = ComputationGraphExecutor(graph, {k: dict(v) for k, v in row.items()})
+        executor.execute(verbose=False)
+        results.append(executor.export_node_data_map())
+    return results
+
+
+def _with_subtotal_code(graph, code):
+    """把 calc_subtotal（读 price、quantity）的代码替换为 code。"""
+    node = graph.get_computation_node("calc_subtotal")
+    return graph.add_computation_node(dataclasses.replace(node, code=code))
+
+
+class TestVectorizedGraphExecutor:
+    """VectorizedGraphExecutor 测试。"""
+
+    def test_arithmetic_nodes_vectorized(self, sample_graph):
+        rows = _rows(50)
+        executor = VectorizedGraphExecutor(sample_graph, rows)
+        results = executor.execute()
+        assert executor.vectorized_node_ids == ["calc_subtotal", "calc_tax"]
+        assert executor.fallback_node_ids == []
+        assert results == _scalar_results(sample_graph, rows)
+        assert isinstance(results[3]["invoice_001"]["subtotal"], float)
+        assert "subtotal" not in rows[0]["invoice_001"]  # 输入行不被修改
+
+    def test_conditional_and_missing_values_fall_back(self, sample_graph, input_specs):
+        flag_out = OutputSpec("property", "Invoice", "big_order")
+        graph = sample_graph.add_computation_node(ComputationNode(
+            id="calc_big_order", name="big_order", level=ComputationLevel.PROPERTY,
+            inputs=(input_specs["subtotal"],), outputs=(flag_out,),
+            code="1 if subtotal > 300 else 0", engine=ComputationEngine.PYTHON,
+        ))
+        graph = graph.add_computation_relationship(ComputationRelationship(
+            "rel_big_in", "invoice_001", "calc_big_order", "subtotal_depends",
+            ComputationRelationType.DEPENDS_ON, "property", datasource=input_specs["subtotal"],
+        ))
+        graph = graph.add_computation_relationship(ComputationRelationship(
+            "rel_big_out", "calc_big_order", "invoice_001", "big_order_result",
+            ComputationRelationType.OUTPUT_TO, "property", data_output=flag_out,
+        ))
+        rows = _rows(20)
+        rows[5]["order_001"]["price"] = None  # price * quantity 在该行出错，不写回
+        executor = VectorizedGraphExecutor(graph, rows)
+        results = executor.execute()
+        assert "calc_big_order" in executor.fallback_node_ids
+        assert "calc_subtotal" in executor.fallback_node_ids
+        assert results == _scalar_results(graph, rows)
+        assert "subtotal" not in results[5]["invoice_001"]
+
+    @pytest.mark.parametrize("code", ["max(price)", "min(price)", "sum(price)", "len(price) * price"])
+    def test_row_reductions_fall_back(self, sample_graph, code):
+        """单参数 max/min、sum、len 在整列上会跨行归约；回退为逐行后与标量执行器一致（逐行出错则不写回）。"""
+        graph = _with_subtotal_code(sample_graph, code)
+        rows = _rows(5)
+        executor = VectorizedGraphExecutor(graph, rows)
+        results = executor.execute()
+        assert "calc_subtotal" in executor.fallback_node_ids
+        assert results == _scalar_results(graph, rows)
+
+    def test_bool_columns_are_not_vectorized(self, sample_graph):
+        """bool 列按 Python 语义逐行求值：True + True == 2。"""
+        graph = _with_subtotal_code(sample_graph, "price + quantity")
+        rows = _rows(4)
+        for row in rows:
+            row["order_001"].update(price=True, quantity=True)
+        executor = VectorizedGraphExecutor(graph, rows)
+        results = executor.execute()
+        assert "calc_subtotal" in executor.fallback_node_ids
+        assert results == _scalar_results(graph, rows)
+        assert results[0]["invoice_001"]["subtotal"] == 2
+
+    def test_integer_arithmetic_is_exact(self, sample_graph):
+        """int 列以 Python int 精确运算，不发生 int64 溢出；结果类型与标量执行器相同。"""
+        graph = _with_subtotal_code(sample_graph, "quantity * quantity")
+        rows = _rows(4)
+        for i, row in enumerate(rows):
+            row["order_001"]["quantity"] = 2**40 + i
+        executor = VectorizedGraphExecutor(graph, rows)
+        results = executor.execute()
+        assert executor.vectorized_node_ids == ["calc_subtotal", "calc_tax"]
+        assert results == _scalar_results(graph, rows)
+        assert results[0]["invoice_001"]["subtotal"] == 2**80
+        assert type(results[0]["invoice_001"]["subtotal"]) is int
+
+    @pytest.mark.parametrize("code", ["round(price * 1.5)", "round(price / 3, 2)"])
+    def test_round_matches_builtin(self, sample_graph, code):
+        """round(x) 返回 int，round(x, n) 与内置 round 结果相同。"""
+        graph = _with_subtotal_code(sample_graph, code)
+        rows = _rows(10)
+        executor = VectorizedGraphExecutor(graph, rows)
+        results = executor.execute()
+        assert "calc_subtotal" in executor.vectorized_node_ids
+        assert results == _scalar_results(graph, rows)
+        assert [type(r["invoice_001"]["subtotal"]) for r in results] == [
+            type(r["invoice_001"]["subtotal"]) for r in _scalar_results(graph, rows)
+        ]
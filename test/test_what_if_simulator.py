@@ -6,7 +6,7 @@ WhatIfSimulator 单元测试。
 import pytest
 
 from domain.services.computation_graph_executor import ComputationGraphExecutor
-from domain.services.what_if_simulator import ScenarioRunResult, WhatIfSimulator
+from domain.services.what_if_simulator import ScenarioRunResult, ScenarioState, WhatIfSimulator
 
 
 class _MockNeo4jManager:
@@ -87,3 +87,154 @@ class TestWhatIfSimulator:
         assert "subtotal" in result.outputs_per_node.get("invoice_001", {})
         assert result.success is True
         assert result.errors == []
+
+    @pytest.mark.asyncio
+    async def test_run_scenario_incremental_matches_full(
+        self, sample_graph, sample_node_data_map
+    ):
+        """incremental=True 只重算下游影响锥，结果与全量执行一致，且执行器状态被恢复。"""
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        before = executor.get_all_data_nodes()
+        simulator = WhatIfSimulator(executor, neo4j_manager=_MockNeo4jManager())
+        changes = [("invoice_001", "tax_rate", 0.2)]
+        full = await simulator.run_scenario(changes, title="")
+        incremental = await simulator.run_scenario(changes, title="", incremental=True)
+        assert incremental.scenario == full.scenario
+        assert sorted(incremental.diff, key=str) == sorted(full.diff, key=str)
+        assert executor.get_all_data_nodes() == before
+
+    @pytest.mark.asyncio
+    async def test_scenario_state_is_read_through(
+        self, sample_graph, sample_node_data_map
+    ):
+        """scenario 只保存变化的节点，读取时合成基线与 delta，与覆盖层内 get_all_data_nodes 一致。"""
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        simulator = WhatIfSimulator(executor, neo4j_manager=_MockNeo4jManager())
+        result = await simulator.run_scenario([("invoice_001", "tax_rate", 0.2)], title="")
+        assert isinstance(result.scenario, ScenarioState)
+        assert set(result.scenario.delta) == {"invoice_001"}
+        assert result.scenario["order_001"] == result.baseline["order_001"]
+        with executor.scenario_overlay():
+            executor.update_node_property("invoice_001", "tax_rate", 0.2)
+            executor.execute(verbose=False)
+            expected = executor.get_all_data_nodes()
+        assert result.scenario == expected
+        assert dict(result.scenario) == expected
+
+    @pytest.mark.asyncio
+    async def test_run_scenario_reuses_baseline_snapshot(
+        self, sample_graph, sample_node_data_map
+    ):
+        """连续 run_scenario 复用同一基线快照，基线更新后使用新快照；to_dict() 可直接 JSON 序列化。"""
+        import json
+
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        simulator = WhatIfSimulator(executor, neo4j_manager=_MockNeo4jManager())
+        first = await simulator.run_scenario([("order_001", "price", 200.0)], title="")
+        second = await simulator.run_scenario([("invoice_001", "tax_rate", 0.2)], title="")
+        assert second.baseline is first.baseline
+        executor.update_node_property("order_001", "quantity", 10)
+        executor.execute_incremental(verbose=False)
+        third = await simulator.run_scenario([("invoice_001", "tax_rate", 0.2)], title="")
+        assert third.baseline is not first.baseline
+        assert third.baseline["invoice_001"]["subtotal"] == 1000.0
+        assert first.baseline["invoice_001"]["subtotal"] == 500.0
+
+        data = json.loads(json.dumps(first.to_dict()))
+        assert data["scenario"] == first.scenario.to_dict()
+        assert data["scenario"]["invoice_001"]["subtotal"] == 1000.0
+        assert data["diff"] == first.diff
+        assert data["success"] is True
+
+    @pytest.mark.asyncio
+    async def test_run_scenarios_shares_baseline(
+        self, sample_graph, sample_node_data_map
+    ):
+        """run_scenarios 对每组变更返回一个结果（顺序一致），共享同一 baseline，与逐个 run_scenario 结果一致。"""
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        before = executor.get_all_data_nodes()
+        simulator = WhatIfSimulator(executor, neo4j_manager=_MockNeo4jManager())
+        change_sets = [
+            [("order_001", "price", 200.0)],
+            [("invoice_001", "tax_rate", 0.2)],
+            [("order_001", "quantity", 10), ("invoice_001", "tax_rate", 0.0)],
+        ]
+        results = await simulator.run_scenarios(change_sets)
+        assert len(results) == 3
+        assert results[0].baseline is results[1].baseline is results[2].baseline
+        assert results[0].scenario["invoice_001"]["tax"] == 100.0
+        assert results[1].scenario["invoice_001"]["tax"] == 100.0
+        assert results[2].scenario["invoice_001"]["subtotal"] == 1000.0
+        assert results[2].scenario["invoice_001"]["tax"] == 0.0
+        for changes, result in zip(change_sets, results):
+            single = await simulator.run_scenario(changes, title="")
+            assert single.scenario == result.scenario
+        lazy = list(simulator.iter_scenarios(change_sets, incremental=True))
+        assert [r.scenario for r in lazy] == [r.scenario for r in results]
+        assert executor.get_all_data_nodes() == before
+
+    @pytest.mark.asyncio
+    async def test_run_scenarios_parallel_matches_sequential(
+        self, sample_graph, sample_node_data_map
+    ):
+        """进程池并行执行的结果与顺序 run_scenarios 一致，顺序与输入一致。"""
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        simulator = WhatIfSimulator(executor, neo4j_manager=_MockNeo4jManager())
+        change_sets = [[("order_001", "price", float(p))] for p in range(100, 110)]
+        sequential = await simulator.run_scenarios(change_sets)
+        parallel = await simulator.run_scenarios_parallel(change_sets, max_workers=2, batch_size=3)
+        assert [r.scenario for r in parallel] == [r.scenario for r in sequential]
+        assert [r.diff for r in parallel] == [r.diff for r in sequential]
+        assert parallel[0].baseline == sequential[0].baseline
+
+    @pytest.mark.asyncio
+    async def test_tracer_exports_chrome_trace(
+        self, sample_graph, sample_node_data_map, tmp_path
+    ):
+        """设置 tracer 后每个场景、diff 与计算节点各有一个 span，可写出 Chrome trace JSON。"""
+        import json
+
+        from domain.services.tracing import TraceRecorder
+
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        tracer = TraceRecorder()
+        simulator = WhatIfSimulator(executor, neo4j_manager=_MockNeo4jManager(), tracer=tracer)
+        await simulator.run_scenarios([[("order_001", "price", 200.0)], [("order_001", "quantity", 1)]])
+
+        names = [(e["cat"], e["name"]) for e in tracer.events]
+        assert names.count(("scenario", "scenario")) == 2
+        assert names.count(("diff", "diff")) == 2
+        assert names.count(("node", "calc_subtotal")) == 2
+        assert all(e["ph"] == "X" and e["dur"] >= 0 for e in tracer.events)
+        path = tmp_path / "trace.json"
+        tracer.write(str(path))
+        trace = json.loads(path.read_text(encoding="utf-8"))
+        assert trace["traceEvents"][0]["ph"] == "M"
+        assert len(trace["traceEvents"]) == len(tracer.events) + 1
+
+    @pytest.mark.asyncio
+    async def test_write_back_diff_from_scenario(self, sample_graph, sample_node_data_map):
+        """ScenarioRunResult.diff 可直接交给 write_back_diff，只写回变化的属性。"""
+        from domain.services.computation_executor import Neo4jDataProvider
+        from domain.services.neo4j_graph_manager import Neo4jGraphManager
+
+        executor = ComputationGraphExecutor(sample_graph, sample_node_data_map)
+        executor.execute(verbose=False)
+        provider = Neo4jDataProvider(mock_data={})
+        manager = Neo4jGraphManager("bolt://unused", "u", "p")
+        manager.data_provider = provider
+        await manager.ensure_data_nodes_from_map(executor.export_node_data_map())
+        simulator = WhatIfSimulator(executor, neo4j_manager=manager)
+        result = await simulator.run_scenario([("order_001", "quantity", 10)], title="")
+
+        stats = await manager.write_back_diff(result.diff)
+        assert stats.written == 2  # order_001 (quantity) and invoice_001 (subtotal, tax)
+        assert provider.mock_data["datanode_order_001"]["quantity"] == 10
+        assert provider.mock_data["datanode_invoice_001"]["subtotal"] == 1000.0
+        assert provider.mock_data["datanode_invoice_001"]["tax"] == 100.0